@@ -0,0 +1,157 @@
+"""
+CAPM Backtester
+Runs the CAPM decision logic from main.py over a recorded heat and sweeps its parameters across all cores.
+
+Record a heat first (see COMMON/recorder.py), then:
+    python backtest.py heat1.ritlog --windows 15,30,60,120 --thresholds 0,0.002,0.005 --sizes 10000:2000:2000:5000,5000:1000:1000:2500
+
+sizes are BUY(er>0):BUY(er<0):SELL(er>0):SELL(er<0), the same four quantities main.py uses.
+Market orders fill at the recorded ask / bid of the tick the decision was made on, so P&L is an upper bound
+that ignores market impact and the speed bump.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from library import BetaEngine, capm_orders, capm_signal, parse_news_item
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from recorder import Replay
+
+MARKET = 'RITM'
+STOCKS = ['ALPHA', 'GAMMA', 'THETA']
+DATA = None
+
+
+# ---------- LOAD RECORDED STREAMS ------------ #
+def load_capture(path, market=MARKET, stocks=STOCKS):
+    """
+    One row per tick: last / bid / ask for the market and each stock as (ticks, tickers) arrays,
+    plus the news items in the order they arrived and the row index each one became visible on.
+    """
+    replay = Replay(path, realtime=False)
+    case_stream = replay.streams[('GET', 'case', ())]
+    tickers = [market] + list(stocks)
+    ticks = []
+    last, bid, ask = [], [], []
+    for t, (status, case) in zip(replay.times[case_stream], replay.bodies[case_stream]):
+        tick = (case['period'], case['tick'])
+        if status != 200 or (ticks and ticks[-1] == tick):
+            continue
+        _, securities = replay.lookup('GET', 'securities', {}, t)
+        by_ticker = {s['ticker']: s for s in securities}
+        if not all(ticker in by_ticker for ticker in tickers):
+            continue
+        ticks.append(tick)
+        last.append([by_ticker[ticker]['last'] for ticker in tickers])
+        bid.append([by_ticker[ticker]['bid'] for ticker in tickers])
+        ask.append([by_ticker[ticker]['ask'] for ticker in tickers])
+
+    _, newsbook = replay.lookup('GET', 'news', {}, float('inf'))
+    news = []
+    for item in sorted(newsbook if isinstance(newsbook, list) else [], key=lambda item: item['news_id']):
+        arrival = (item.get('period', 1), item.get('tick', 0))
+        row = next((i for i, tick in enumerate(ticks) if tick >= arrival), len(ticks))
+        news.append((row, item))
+
+    return {'tickers': tickers, 'ticks': ticks, 'last': np.array(last, dtype=float),
+            'bid': np.array(bid, dtype=float), 'ask': np.array(ask, dtype=float), 'news': news}
+
+
+# ---------- SIMULATION ------------ #
+def init_worker(data):
+    global DATA
+    DATA = data
+
+
+def run_config(config):
+    window, threshold, sizes, fee = config
+    data = DATA
+    stocks = data['tickers'][1:]
+    engine = BetaEngine(stocks, data['tickers'][0], window)
+    positions = np.zeros(len(data['tickers']))
+    cash = 0.0
+    turnover = 0.0
+    trades = 0
+    latencies = []
+    values = {}
+    news = iter(data['news'])
+    pending = next(news, None)
+    seen = 0
+
+    for row in range(len(data['ticks'])):
+        while pending is not None and pending[0] <= row:
+            values.update(parse_news_item(pending[1], first=seen == 0))
+            seen += 1
+            pending = next(news, None)
+
+        start = time.perf_counter()
+        prices = data['last'][row]
+        engine.update_prices(prices)
+        forward = values.get('forward')
+        orders = []
+        action = capm_signal(prices[0], forward, threshold)
+        if action and '%Rf' in values:
+            rm = (forward - prices[0]) / prices[0]
+            expected_return = dict(zip(stocks, engine.expected_returns(values['%Rf'], rm)))
+            orders = capm_orders(expected_return, action, sizes)
+        latencies.append(time.perf_counter() - start)
+
+        for ticker, quantity in orders:
+            col = data['tickers'].index(ticker)
+            price = data['ask'][row, col] if action == 'BUY' else data['bid'][row, col]
+            signed = quantity if action == 'BUY' else -quantity
+            positions[col] += signed
+            cash -= signed * price + fee * quantity
+            turnover += quantity * price
+            trades += 1
+
+    final = (data['bid'][-1] + data['ask'][-1]) / 2 if len(data['ticks']) else np.zeros(len(positions))
+    latencies = np.array(latencies) * 1e6 if latencies else np.zeros(1)
+    return {'window': window, 'threshold': threshold, 'sizes': sizes, 'pnl': cash + positions.dot(final),
+            'turnover': turnover, 'trades': trades, 'latency_us': latencies.mean(),
+            'latency_p99_us': np.percentile(latencies, 99)}
+
+
+def sweep(data, windows, thresholds, sizes, fee=0.0, workers=None):
+    grid = list(itertools.product(windows, thresholds, sizes, [fee]))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(data,)) as pool:
+        results = list(pool.map(run_config, grid, chunksize=max(1, len(grid) // (4 * (workers or os.cpu_count() or 1)))))
+    return sorted(results, key=lambda result: -result['pnl'])
+
+
+def parse_sizes(text):
+    buy_pos, buy_neg, sell_pos, sell_neg = (int(x) for x in text.split(':'))
+    return {'BUY': (buy_pos, buy_neg), 'SELL': (sell_pos, sell_neg)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parameter sweep of the CAPM strategy over a recorded heat')
+    parser.add_argument('capture')
+    parser.add_argument('--windows', default='30')
+    parser.add_argument('--thresholds', default='0')
+    parser.add_argument('--sizes', default='10000:2000:2000:5000')
+    parser.add_argument('--fee', type=float, default=0.0, help='cost per share on every fill')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    data = load_capture(args.capture)
+    print(f"{len(data['ticks'])} ticks, {len(data['news'])} news items")
+    results = sweep(data, [int(w) for w in args.windows.split(',')], [float(t) for t in args.thresholds.split(',')],
+                    [parse_sizes(s) for s in args.sizes.split(',')], args.fee, args.workers)
+
+    print(f'{"window":>7}{"thresh":>8}{"sizes":>26}{"P&L":>13}{"turnover":>14}{"trades":>8}{"us/tick":>9}{"p99 us":>9}')
+    for r in results[:args.top]:
+        sizes = '{}:{}:{}:{}'.format(*r['sizes']['BUY'], *r['sizes']['SELL'])
+        print(f"{r['window']:>7}{r['threshold']:>8.4f}{sizes:>26}{r['pnl']:>13.2f}{r['turnover']:>14.0f}"
+              f"{r['trades']:>8}{r['latency_us']:>9.1f}{r['latency_p99_us']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
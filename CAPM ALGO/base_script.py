@@ -14,6 +14,7 @@ import requests
 from time import sleep
 import pandas as pd
 import matplotlib.pyplot as plt
+from library import NewsIngester
 
 CAPM_vals = {}
 expected_return = {}
@@ -29,8 +30,7 @@ def signal_handler(signum, frame):
 
 API_KEY = {'X-API-Key': 'rotman'}
 shutdown = False
-session = requests.Session()
-session.headers.update(API_KEY)
+news_ingester = NewsIngester()
 
 #code that gets the current tick
 def get_tick(session):
@@ -40,23 +40,12 @@ def get_tick(session):
         return case['tick']
     raise ApiException('fail - cant get tick')
 
-#code that parses the first and latest news instances for forward market predictions and the risk free rate
-#Important: this code only works if the only '%' character is in front of the RISK FREE RATE and the onle '$' character is in front of the forward price suggestions
+#code that pulls the forward market predictions and the risk free rate out of any news items published since the last call
+#Important: this code only works if the first news item carries the RISK FREE RATE in front of a '%' and later items carry the forward price after a '$'
 def get_news(session):
-    news = session.get('http://localhost:9999/v1/news')    
-    if news.ok:
-        newsbook = news.json()
-        for i in range(len(newsbook[-1]['body'])):
-            if newsbook[-1]['body'][i] == '%':
-                CAPM_vals['%Rf'] = round(float(newsbook[-1]['body'][i - 4:i])/100, 4)               
-        latest_news = newsbook[0]
-        if len(newsbook) > 1:
-            for j in range(len(latest_news['body']) - 1, 1, -1):    
-                while latest_news['body'][j] != '$':
-                    j -= 1
-            CAPM_vals['forward'] = float(latest_news['body'][j + 1:-1])
-        return CAPM_vals
-    raise ApiException('timeout')
+    news_ingester.poll(session)
+    CAPM_vals.update(news_ingester.values)
+    return CAPM_vals
 
 #gets all the price data for all securities        
 def pop_prices(session):
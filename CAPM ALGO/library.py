@@ -0,0 +1,206 @@
+"""
+CAPM Support File
+Helpers shared by the CAPM scripts in this folder.
+"""
+
+import os
+import re
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from api import API_URL, ApiException, fetch
+
+
+# ---------- BETA ENGINE ------------ #
+class BetaEngine:
+    """
+    Rolling CAPM betas for any list of stocks against one market ticker.
+
+    Returns for the market and every stock sit in one fixed-capacity 2-D ring buffer (column 0 is the market).
+    The column sums and the sums of each column times the market column are kept up to date as rows enter
+    and leave, so every covariance, the market variance and every beta come out of one vector expression per tick.
+    Same sample (n - 1) estimators as Series.cov / Series.var.
+
+    tickers: stock tickers to estimate betas for
+    market: market proxy ticker
+    capacity: number of returns kept in the window
+    """
+    def __init__(self, tickers, market='RITM', capacity=30):
+        self.tickers = list(tickers)
+        self.market = market
+        self.columns = [market] + self.tickers
+        self.capacity = capacity
+        self.returns = np.zeros((capacity, len(self.columns)))
+        self.head = 0
+        self.count = 0
+        self.pushes = 0
+        self.prev = None
+        self.sums = np.zeros(len(self.columns))
+        self.cross = np.zeros(len(self.columns))
+
+    def update(self, snapshot):
+        self.update_prices(np.array([snapshot.last(ticker) for ticker in self.columns], dtype=float))
+
+    # a return row is added whenever any last price moves
+    def update_prices(self, prices):
+        if self.prev is not None:
+            if np.array_equal(prices, self.prev):
+                return
+            if self.prev.all():
+                self.push(prices / self.prev - 1)
+        self.prev = prices
+
+    def push(self, row):
+        if self.count == self.capacity:
+            old = self.returns[self.head]
+            self.sums -= old
+            self.cross -= old * old[0]
+        else:
+            self.count += 1
+
+        self.returns[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.sums += row
+        self.cross += row * row[0]
+
+        # add/subtract leaves rounding error behind, rebuild the sums from the buffer once per lap
+        self.pushes += 1
+        if self.pushes % self.capacity == 0:
+            self.resync()
+
+    def resync(self):
+        window = self.returns[:self.count]
+        self.sums = window.sum(axis=0)
+        self.cross = window.T.dot(window[:, 0])
+
+    # covariance of every column with the market, element 0 is the market variance
+    def covariances(self):
+        n = self.count
+        if n < 2:
+            return np.full(len(self.columns), np.nan)
+        return (self.cross - self.sums * self.sums[0] / n) / (n - 1)
+
+    def betas(self):
+        cov = self.covariances()
+        if not cov[0]:
+            return np.full(len(self.tickers), np.nan)
+        return cov[1:] / cov[0]
+
+    def expected_returns(self, rf, rm):
+        return rf + self.betas() * (rm - rf)
+
+
+# ---------- DECISION ------------ #
+# order size per action, (expected return > 0, expected return < 0)
+ORDER_SIZES = {'BUY': (10000, 2000), 'SELL': (2000, 5000)}
+
+
+#BUY when RITM trades below the forward price suggestion, SELL when above, threshold is a fraction of the forward
+def capm_signal(price, forward, threshold=0.0):
+    if forward is None or price is None:
+        return None
+    if price < forward * (1 - threshold):
+        return 'BUY'
+    if price > forward * (1 + threshold):
+        return 'SELL'
+    return None
+
+
+#(ticker, quantity) for every stock with a numerical expected return
+def capm_orders(expected_return, action, sizes=ORDER_SIZES):
+    positive, negative = sizes[action]
+    orders = []
+    for ticker, er in expected_return.items():
+        if isinstance(er, (float, int)) and er == er:
+            if er > 0:
+                orders.append((ticker, positive))
+            elif er < 0:
+                orders.append((ticker, negative))
+    return orders
+
+
+# ---------- MARKET SNAPSHOT ------------ #
+class MarketSnapshot:
+    """
+    One consistent view of the case, securities and news taken at the same point in the loop.
+    Securities are indexed by ticker so consumers never depend on the order the server returns them in.
+    news only holds the items that arrived since the previous snapshot.
+    """
+    def __init__(self, case, securities, news):
+        self.case = case
+        self.tick = case['tick']
+        self.period = case['period']
+        self.securities = {security['ticker']: security for security in securities}
+        self.news = news
+
+    def last(self, ticker):
+        return self.securities[ticker]['last']
+
+    def bid_ask(self, ticker):
+        security = self.securities[ticker]
+        return security['bid'], security['ask']
+
+
+#one round-trip per endpoint, shared by everything that runs on this tick
+#pass in the case when it has already been read this tick (e.g. by the tick scheduler)
+def get_snapshot(session, news_ingester, case=None):
+    if case is None:
+        case = fetch(session, 'case')
+    securities = fetch(session, 'securities')
+    news = news_ingester.poll(session)
+    return MarketSnapshot(case, securities, news)
+
+
+# ---------- NEWS ------------ #
+RF_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+FORWARD_PATTERN = re.compile(r'\$\s*(\d[\d,]*(?:\.\d+)?)')
+
+
+def parse_news_item(item, first=False):
+    """
+    Pull the CAPM inputs out of one news item.
+
+    The opening item of the case carries the risk free rate (the number in front of '%'),
+    every later item carries a forward price suggestion for RITM (the number after '$').
+    """
+    body = item['body']
+    parsed = {}
+    if first:
+        match = RF_PATTERN.search(body)
+        if match:
+            parsed['%Rf'] = round(float(match.group(1)) / 100, 4)
+    else:
+        match = FORWARD_PATTERN.search(body)
+        if match:
+            parsed['forward'] = float(match.group(1).replace(',', ''))
+    return parsed
+
+
+class NewsIngester:
+    """
+    Reads the news book incrementally.
+
+    Only items newer than the last seen news_id are requested (the 'since' parameter of /v1/news),
+    each item is parsed once and kept by id, and values holds the latest '%Rf' / 'forward'.
+    """
+    def __init__(self):
+        self.last_id = 0
+        self.items = {}
+        self.values = {}
+
+    def poll(self, session):
+        resp = session.get(f'{API_URL}/news', params={'since': self.last_id})
+        if not resp.ok:
+            raise ApiException('fail - cant get news')
+        fresh = sorted((item for item in resp.json() if item['news_id'] > self.last_id),
+                       key=lambda item: item['news_id'])
+        for item in fresh:
+            self.ingest(item)
+        return fresh
+
+    def ingest(self, item):
+        parsed = parse_news_item(item, first=not self.items)
+        self.items[item['news_id']] = parsed
+        self.values.update(parsed)
+        self.last_id = max(self.last_id, item['news_id'])
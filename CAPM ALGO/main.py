@@ -1,16 +1,20 @@
+import os
+import sys
 import signal
 import requests
-from time import sleep
-import pandas as pd
 import matplotlib.pyplot as plt
+from library import BetaEngine, NewsIngester, capm_orders, capm_signal, get_snapshot
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from gateway import order_gateway
+from risk import RiskGate
+from scheduler import TickScheduler
 
 CAPM_vals = {}
 expected_return = {}
-prev_price = None
-
-# class that passes error message, ends the program
-class ApiException(Exception):
-    pass
+WINDOW = 30
+MARKET = 'RITM'
+STOCKS = ['ALPHA', 'GAMMA', 'THETA']
 
 # code that lets us shut down if CTRL C is pressed
 def signal_handler(signum, frame):
@@ -20,165 +24,63 @@ def signal_handler(signum, frame):
 
 API_KEY = {'X-API-Key': '1OYMUT6S'}
 shutdown = False
-session = requests.Session()
-session.headers.update(API_KEY)
-
-#code that gets the current tick
-def get_tick(session):
-    resp = session.get('http://localhost:9999/v1/case')
-    if resp.ok:
-        case = resp.json()
-        return case['tick']
-    raise ApiException('fail - cant get tick')
+news_ingester = NewsIngester()
 
-#code that parses the first and latest news instances for forward market predictions and the risk free rate
-#Important: this code only works if the only '%' character is in front of the RISK FREE RATE and the only '$' character is in front of the forward price suggestions
-def get_news(session):
-    news = session.get('http://localhost:9999/v1/news')    
-    if news.ok:
-        newsbook = news.json()
-        for i in range(len(newsbook[-1]['body'])):
-            if newsbook[-1]['body'][i] == '%':
-                CAPM_vals['%Rf'] = round(float(newsbook[-1]['body'][i - 4:i])/100, 4)               
-        latest_news = newsbook[0]
-        if len(newsbook) > 1:
-            for j in range(len(latest_news['body']) - 1, 1, -1):    
-                while latest_news['body'][j] != '$':
-                    j -= 1
-            CAPM_vals['forward'] = float(latest_news['body'][j + 1:-1])
-        return CAPM_vals
-    raise ApiException('timeout')
-
-#gets all the price data for all securities        
-def pop_prices(session):
-    price_act = session.get('http://localhost:9999/v1/securities')
-    if price_act.ok:
-        prices = price_act.json()
-        return prices
-    raise ApiException('fail - cant get securities')
-
-#Buy function
+#Buy function, all tickers are sent at once through the order gateway
 def buy_stock(session, expected_return):
-    for i in expected_return.keys():
-        # Check if the expected return value is a numerical type (float or int)
-        if isinstance(expected_return[i], (float, int)):
-            print(expected_return[i])
-            if expected_return[i] > 0:
-                session.post('http://localhost:9999/v1/orders', params={'ticker': i, 'type': 'MARKET', 'quantity': '10000', 'action': 'BUY'})
-            elif expected_return[i] < 0:
-                session.post('http://localhost:9999/v1/orders', params={'ticker': i, 'type': 'MARKET', 'quantity': '2000', 'action': 'BUY'})
-        else:
-            print(f"Expected return for {i} is not numerical: {expected_return[i]}")
+    return [order_gateway(session).submit(ticker, quantity, 'BUY') for ticker, quantity in capm_orders(expected_return, 'BUY')]
             
 #Sell function
 def sell_stock(session, expected_return):
-    for i in expected_return.keys():
-        # Check if the expected return value is a numerical type (float or int)
-        if isinstance(expected_return[i], (float, int)):
-            print(expected_return[i])
-            if expected_return[i] > 0:
-                session.post('http://localhost:9999/v1/orders', params={'ticker': i, 'type': 'MARKET', 'quantity': '2000', 'action': 'SELL'})
-            elif expected_return[i] < 0:
-                session.post('http://localhost:9999/v1/orders', params={'ticker': i, 'type': 'MARKET', 'quantity': '5000', 'action': 'SELL'})
-        else:
-            print(f"Expected return for {i} is not numerical: {expected_return[i]}")
+    return [order_gateway(session).submit(ticker, quantity, 'SELL') for ticker, quantity in capm_orders(expected_return, 'SELL')]
 
 def main():
     with requests.Session() as session:
         session.headers.update(API_KEY)
-        ritm = pd.DataFrame(columns= ['RITM','BID', 'ASK', 'LAST', '%Rm'])
-        alpha = pd.DataFrame(columns= ['ALPHA','BID', 'ASK', 'LAST', '%Ri', '%Rm'])
-        gamma = pd.DataFrame(columns= ['GAMMA','BID', 'ASK', 'LAST', '%Ri', '%Rm'])
-        theta = pd.DataFrame(columns= ['THETA','BID', 'ASK', 'LAST', '%Ri', '%Rm'])
-        price = pd.DataFrame(columns = ['ALPHA', 'GAMMA', 'THETA'])
+        order_gateway(session).set_risk(RiskGate.from_session(session))
+        beta_engine = BetaEngine(STOCKS, MARKET, WINDOW)
+
+        def on_tick(case):
+            snapshot = get_snapshot(session, news_ingester, case)
 
-        while get_tick(session) < 600 and not shutdown:
             #update the forward market price and rf rate
-            get_news(session)
+            CAPM_vals.update(news_ingester.values)
             
-            ##update RITM bid-ask dataframe
-            pdt_RITM = pd.DataFrame(pop_prices(session)[0])
-            ritmp = pd.DataFrame({'RITM': '', 'BID': pdt_RITM['bid'],'ASK': pdt_RITM['ask'], 'LAST': pdt_RITM['last'], '%Rm': ''})
-            if ritm['BID'].empty or ritmp['LAST'].iloc[0] != ritm['LAST'].iloc[0]:
-                ritm = pd.concat([ritmp, ritm.loc[:]]).reset_index(drop=True)
-                ritm['%Rm'] = (ritm['LAST']/ritm['LAST'].shift(-1)) - 1
-                if ritm.shape[0] >= 31:
-                    ritm = ritm.iloc[:30]
+            ##update market and stock return windows
+            ritm_last = snapshot.last(MARKET)
+            beta_engine.update(snapshot)
             
             #generate expected market return paramter
             if 'forward' in CAPM_vals.keys():
-                CAPM_vals['%RM'] = (CAPM_vals['forward']-ritm['LAST'].iloc[0])/ritm['LAST'].iloc[0]
+                CAPM_vals['%RM'] = (CAPM_vals['forward']-ritm_last)/ritm_last
             else:
                 CAPM_vals['%RM'] = ''
               
-            ##update ALPHA bid-ask dataframe
-            pdt_ALPHA = pd.DataFrame(pop_prices(session)[1])
-            alphap = pd.DataFrame({'ALPHA': '', 'BID': pdt_ALPHA['bid'],'ASK': pdt_ALPHA['ask'], 'LAST': pdt_ALPHA['last'], '%Ri': '', '%Rm': ''})
-            if alpha['BID'].empty or alphap['LAST'].iloc[0] != alpha['LAST'].iloc[0]:
-                alpha = pd.concat([alphap, alpha.loc[:]]).reset_index(drop=True)
-                alpha['%Ri'] = (alpha['LAST']/alpha['LAST'].shift(-1)) - 1
-                alpha['%Rm'] = (ritm['LAST']/ritm['LAST'].shift(-1)) - 1
-                if alpha.shape[0] >= 31:
-                    alpha = alpha.iloc[:30]
-              
-            ##update GAMMA bid-ask dataframe
-            pdt_GAMMA = pd.DataFrame(pop_prices(session)[2])
-            gammap = pd.DataFrame({'GAMMA': '', 'BID': pdt_GAMMA['bid'],'ASK': pdt_GAMMA['ask'], 'LAST': pdt_GAMMA['last'], '%Ri': '', '%Rm': ''})
-            if gamma['BID'].empty or gammap['LAST'].iloc[0] != gamma['LAST'].iloc[0]:
-                gamma = pd.concat([gammap, gamma.loc[:]]).reset_index(drop=True)
-                gamma['%Ri'] = (gamma['LAST']/gamma['LAST'].shift(-1)) - 1
-                gamma['%Rm'] = (ritm['LAST']/ritm['LAST'].shift(-1)) - 1
-                if gamma.shape[0] >= 31:
-                    gamma = gamma.iloc[:30]            
-            
-            ##update THETA bid-ask dataframe
-            pdt_THETA = pd.DataFrame(pop_prices(session)[3])
-            thetap = pd.DataFrame({'THETA': '', 'BID': pdt_THETA['bid'],'ASK': pdt_THETA['ask'], 'LAST': pdt_THETA['last'], '%Ri': '', '%Rm': ''})
-            if theta['BID'].empty or thetap['LAST'].iloc[0] != theta['LAST'].iloc[0]:     
-                theta = pd.concat([thetap, theta.loc[:]]).reset_index(drop=True)
-                theta['%Ri'] = (theta['LAST']/theta['LAST'].shift(-1)) - 1
-                theta['%Rm'] = (ritm['LAST']/ritm['LAST'].shift(-1)) - 1
-                if theta.shape[0] >= 31:
-                    theta = theta.iloc[:30]
-
-            beta_alpha = (alpha['%Ri'].cov(ritm['%Rm']))/(ritm['%Rm'].var())
-            beta_gamma = (gamma['%Ri'].cov(ritm['%Rm']))/(ritm['%Rm'].var())
-            beta_theta = (theta['%Ri'].cov(ritm['%Rm']))/(ritm['%Rm'].var()) 
-
-            CAPM_vals['Beta - ALPHA'] = beta_alpha
-            CAPM_vals['Beta - GAMMA'] = beta_gamma
-            CAPM_vals['Beta - THETA'] = beta_theta
+            for ticker, beta in zip(STOCKS, beta_engine.betas()):
+                CAPM_vals['Beta - ' + ticker] = beta
             
             if CAPM_vals['%RM'] != '':
-                er_alpha = CAPM_vals['%Rf'] + CAPM_vals['Beta - ALPHA'] * (CAPM_vals['%RM'] - CAPM_vals['%Rf'])
-                er_gamma = CAPM_vals['%Rf'] + CAPM_vals['Beta - GAMMA'] * (CAPM_vals['%RM'] - CAPM_vals['%Rf'])
-                er_theta = CAPM_vals['%Rf'] + CAPM_vals['Beta - THETA'] * (CAPM_vals['%RM'] - CAPM_vals['%Rf'])
+                expected_return.update(zip(STOCKS, beta_engine.expected_returns(CAPM_vals['%Rf'], CAPM_vals['%RM'])))
             else:
-                er_alpha = 'Wait for market forward price'
-                er_gamma = 'Wait for market forward price'
-                er_theta = 'Wait for market forward price'
-            
-            expected_return['ALPHA'] = er_alpha
-            expected_return['GAMMA'] = er_gamma
-            expected_return['THETA'] = er_theta
+                expected_return.update(dict.fromkeys(STOCKS, 'Wait for market forward price'))
 
             #print statement (print, expected_return function, any of the tickers, or CAPM_vals dictionary)
             #print(expected_return)
 
-            price = ritmp['LAST']
-            forward = int(CAPM_vals['forward'])
+            forward = CAPM_vals.get('forward')
             print(forward)
             
-            if forward is not None:
-                if price is not None:
-                    if(price < forward).any():
-                        # Buy the stock
-                        print("BUY")
-                        buy_stock(session, expected_return)
-                    elif(price > forward).any():
-                        # Sell the stock
-                        print("SELL")
-                        sell_stock(session, expected_return)
+            action = capm_signal(ritm_last, forward)
+            if action == 'BUY':
+                print("BUY")
+                buy_stock(session, expected_return)
+            elif action == 'SELL':
+                print("SELL")
+                sell_stock(session, expected_return)
+
+        scheduler = TickScheduler(session)
+        scheduler.on_tick(on_tick)
+        scheduler.run(lambda case: case['tick'] >= 600 or shutdown)
 
 
 if __name__ == '__main__':
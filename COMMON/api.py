@@ -0,0 +1,18 @@
+"""
+RIT REST API Support File
+Pieces shared by every case folder. Scripts add this folder to sys.path before importing from it.
+"""
+
+API_URL = 'http://localhost:9999/v1'
+
+
+# class that passes error message, ends the program
+class ApiException(Exception):
+    pass
+
+
+def fetch(session, endpoint, **params):
+    resp = session.get(f'{API_URL}/{endpoint}', params=params or None)
+    if resp.ok:
+        return resp.json()
+    raise ApiException(f'fail - cant get {endpoint}')
@@ -0,0 +1,164 @@
+"""
+Basket Arbitrage Monitor
+Streams the mispricing between an ETF (or a cross-listed share) and the basket it converts into, and raises an
+executable signal when the touch prices beat fees.
+
+    spread = ETF mid * fx - sum(ratio * leg mid)
+
+fx is the price of the ETF's currency in the basket's currency (the USD ticker where the case has one), None when
+both sides trade in one currency. The same monitor covers RITC against COMP in the ETF case, and RIT_C (CAD) and
+RIT_U (USD) against HAWK + DOVE in the market making case. With an fx ticker configured nothing is computed until it
+is quoted, so prices in two currencies are never compared as-is; a missing fx ticker is logged once.
+Each update does a fixed amount of work. A rolling window of spreads keeps its mean and variance by add / drop
+Welford steps, so the z-score needs no pass over history.
+
+With a converter (creation / redemption) the spread is locked in, so edges are measured from zero less the
+converter cost. Without one, they are measured from the rolling mean the spread is expected to revert to.
+Fees cover every leg of the signal, the fx leg included; the fx spread is paid by converting at its bid / ask.
+
+    arb = BasketArbitrage('RIT_U', {'HAWK': 1, 'DOVE': 1}, fx='USD', converter_cost=0.15)
+    signal = arb.update({s['ticker']: s for s in get_securities(session)})
+    if signal:
+        print(format_signal(signal))     # legs with sizes, z-score and expected edge after fees
+"""
+
+import math
+from collections import deque
+
+WINDOW = 120            # spreads kept for the rolling mean / variance
+ENTRY_Z = 2.0
+MIN_EDGE = 0.0          # per ETF share after fees
+FEE = 0.02              # per share per leg on market orders
+FX_FEE = 0.0            # per unit of currency traded, the cases charge none on CAD / USD
+MAX_SIZE = 10000        # max_trade_size
+
+
+class RollingStats:
+    """Mean and variance over the last `window` values, O(1) per add."""
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.values.append(x)
+        n = len(self.values)
+        if n > self.window:
+            y = self.values.popleft()
+            n -= 1
+            old = self.mean
+            self.mean += (x - y) / n
+            self.m2 += (x - y) * (x - self.mean + y - old)
+        else:
+            delta = x - self.mean
+            self.mean += delta / n
+            self.m2 += delta * (x - self.mean)
+        self.m2 = max(self.m2, 0.0)
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def zscore(self, x):
+        std = math.sqrt(self.variance)
+        return (x - self.mean) / std if std > 0 else 0.0
+
+
+class BasketArbitrage:
+    """
+    etf: ticker of the ETF / cross-listed share
+    legs: {ticker: shares of it per ETF share}
+    fx: ticker quoting the ETF's currency in the basket's currency, None when both trade in the same currency
+    converter_cost: per ETF share to create / redeem, in the ETF's currency, None when the case has no converter
+    """
+    def __init__(self, etf, legs, fx=None, window=WINDOW, entry_z=ENTRY_Z, min_edge=MIN_EDGE, fee=FEE,
+                 converter_cost=None, max_size=MAX_SIZE, fx_fee=FX_FEE):
+        self.etf = etf
+        self.legs = dict(legs)
+        self.fx = fx
+        self.entry_z = entry_z
+        self.min_edge = min_edge
+        self.fee = fee
+        self.fx_fee = fx_fee
+        self.fx_missing = False
+        self.converter_cost = converter_cost
+        self.max_size = max_size
+        self.stats = RollingStats(window)
+        self.spread = None
+        self.z = 0.0
+
+    def rate(self, securities, side):
+        """fx rate to convert at: 'bid' when we sell the ETF's currency, 'ask' when we buy it."""
+        return securities[self.fx][side] if self.fx else 1.0
+
+    def update(self, securities):
+        """
+        securities: {ticker: security or quote dict with bid, ask, bid_size, ask_size}.
+        Returns a signal dict, or None while there is no trade.
+        """
+        if self.fx and self.fx not in securities:
+            if not self.fx_missing:
+                print(f'{self.etf} arbitrage: {self.fx} is not quoted, nothing is measured until it is')
+                self.fx_missing = True
+            return None
+        etf = securities.get(self.etf)
+        legs = [(securities.get(ticker), ratio) for ticker, ratio in self.legs.items()]
+        fx = securities.get(self.fx) if self.fx else None
+        if self.fx and (not fx or not fx['bid'] or not fx['ask']):
+            return None
+        if not etf or not etf['bid'] or not etf['ask'] or any(not q or not q['bid'] or not q['ask'] for q, _ in legs):
+            return None
+
+        fx_mid = (self.rate(securities, 'bid') + self.rate(securities, 'ask')) / 2
+        self.spread = (etf['bid'] + etf['ask']) / 2 * fx_mid - sum(r * (q['bid'] + q['ask']) / 2 for q, r in legs)
+        self.z = self.stats.zscore(self.spread) if self.stats.count > 1 else 0.0
+        self.stats.add(self.spread)
+
+        # executable spreads at the touch, both directions, in basket currency per ETF share
+        sell_etf = etf['bid'] * self.rate(securities, 'bid') - sum(r * q['ask'] for q, r in legs)
+        buy_etf = sum(r * q['bid'] for q, r in legs) - etf['ask'] * self.rate(securities, 'ask')
+        # market-order fees on the ETF (charged in its currency) and the basket legs, plus the fx leg's currency trade
+        fees = self.fee * fx_mid + self.fee * sum(self.legs.values())
+        if self.fx:
+            fees += self.fx_fee * (etf['bid'] + etf['ask']) / 2
+        if self.converter_cost is not None:
+            fair = 0.0
+            fees += self.converter_cost * fx_mid
+        else:
+            fair = self.stats.mean
+        sell_edge = sell_etf - fair - fees
+        buy_edge = buy_etf + fair - fees
+
+        if sell_edge > self.min_edge and (self.converter_cost is not None or self.z > self.entry_z):
+            return self.signal('SELL', sell_edge, etf, legs, securities)
+        if buy_edge > self.min_edge and (self.converter_cost is not None or self.z < -self.entry_z):
+            return self.signal('BUY', buy_edge, etf, legs, securities)
+        return None
+
+    def signal(self, action, edge, etf, legs, securities):
+        hedge = 'BUY' if action == 'SELL' else 'SELL'
+        # what the touch can fill on every leg at once
+        size = min(self.max_size, etf['bid_size'] if action == 'SELL' else etf['ask_size'],
+                   *((q['ask_size'] if hedge == 'BUY' else q['bid_size']) / r for q, r in legs if r))
+        size = int(size)
+        if size <= 0:
+            return None
+        orders = [(self.etf, action, size)]
+        orders += [(ticker, hedge, int(size * r)) for ticker, r in self.legs.items()]
+        if self.fx:
+            # selling the ETF brings in its currency, buying it needs some
+            price = etf['bid'] if action == 'SELL' else etf['ask']
+            orders.append((self.fx, 'SELL' if action == 'SELL' else 'BUY', int(size * price)))
+        return {'etf': self.etf, 'action': action, 'size': size, 'orders': orders, 'spread': self.spread,
+                'mean': self.stats.mean, 'z': self.z, 'edge': edge, 'expected_profit': edge * size}
+
+
+def format_signal(signal):
+    legs = ', '.join(f'{action} {quantity} {ticker}' for ticker, action, quantity in signal['orders'])
+    return (f"{signal['action']} {signal['etf']} spread {signal['spread']:.4f} (mean {signal['mean']:.4f}, "
+            f"z {signal['z']:.2f}), edge {signal['edge']:.4f}/sh, expected {signal['expected_profit']:.2f}: {legs}")
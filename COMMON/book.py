@@ -0,0 +1,79 @@
+"""
+Order Book Snapshots
+GET /v1/securities/book as price / size arrays, best price first, and a book-walk cost model for liquidating
+a tender into the visible depth.
+
+    book = get_book(session, 'RITC')
+    cost = liquidation_cost(book, 'BUY', 100000, fee=0.02)   # we buy 100k from the tender, sell it into the bids
+    cost['break_even']                                       # highest tender price that still breaks even
+"""
+
+import numpy as np
+from api import fetch
+
+BOOK_LIMIT = 50
+
+
+def get_book(session, ticker, limit=BOOK_LIMIT):
+    return fetch(session, 'securities/book', ticker=ticker, limit=limit)
+
+
+def book_side(book, action, exclude=()):
+    """
+    Liquidity a market order with this action would take: asks for BUY, bids for SELL.
+    Orders in exclude (our own resting order ids) are left out.
+    Returns (prices, sizes) as float arrays, best price first.
+    """
+    entries = book['asks'] if action == 'BUY' else book['bids']
+    prices = np.array([o['price'] for o in entries if o['order_id'] not in exclude], dtype=float)
+    sizes = np.array([o['quantity'] - o['quantity_filled'] for o in entries if o['order_id'] not in exclude],
+                     dtype=float)
+    return prices, sizes
+
+
+def walk_book(prices, sizes, quantities):
+    """
+    Fill every quantity in `quantities` against the levels at once.
+    Returns (filled, notional, last_price) arrays, one entry per quantity.
+    """
+    quantities = np.atleast_1d(np.asarray(quantities, dtype=float))
+    if not len(prices):
+        zeros = np.zeros(len(quantities))
+        return zeros, zeros, np.full(len(quantities), np.nan)
+    before = np.cumsum(sizes) - sizes
+    take = np.clip(quantities[:, None] - before[None, :], 0, sizes[None, :])
+    filled = take.sum(axis=1)
+    notional = take @ prices
+    last = prices[np.maximum((take > 0).sum(axis=1) - 1, 0)]
+    return filled, notional, last
+
+
+def liquidation_cost(book, tender_action, quantities, fee=0.0, exclude=()):
+    """
+    Value of taking a tender of `quantities` (scalar or array) and closing it with market orders into the book.
+    tender_action is our side of the tender: BUY means we buy from the client and sell into the bids.
+    Whatever the visible book can't absorb is marked at its deepest level, and reported as `unfilled`.
+
+    proceeds: cash from the unwind after fees (negative = cost of buying back)
+    vwap: average unwind price
+    break_even: tender price at which the whole trade nets zero
+    """
+    unwind = 'SELL' if tender_action == 'BUY' else 'BUY'
+    prices, sizes = book_side(book, unwind, exclude)
+    quantities = np.atleast_1d(np.asarray(quantities, dtype=float))
+    filled, notional, last = walk_book(prices, sizes, quantities)
+    unfilled = quantities - filled
+    # no visible book at all leaves vwap and break_even as nan, so no tender ever clears
+    notional = notional + np.where(unfilled > 0, unfilled * last, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = np.where(quantities > 0, notional / quantities, np.nan)
+    sign = 1 if unwind == 'SELL' else -1
+    return {'quantity': quantities, 'filled': filled, 'unfilled': unfilled, 'vwap': vwap,
+            'proceeds': sign * notional - fee * quantities, 'break_even': vwap - sign * fee}
+
+
+def tender_edge(book, tender_action, quantity, price, fee=0.0, exclude=()):
+    """Per-share profit of accepting a fixed-price tender at `price` after walking the book to unwind it."""
+    cost = liquidation_cost(book, tender_action, quantity, fee, exclude)
+    break_even = cost['break_even'][0]
+    return (break_even - price if tender_action == 'BUY' else price - break_even), cost
@@ -0,0 +1,74 @@
+"""
+Connection Management
+Keep-alive HTTP sessions for scripts that talk to the RIT API from more than one thread.
+
+requests.Session is not documented as thread-safe, and its default adapter keeps a small pool per host, so
+strategy threads sharing one session end up serialising on it and reconnecting when the pool overflows.
+SessionPool hands every strategy thread its own session, all with the same headers and the same tuned adapter:
+
+    sessions = SessionPool(API_KEY)
+    threading.Thread(target=make_market, args=(sessions.new(), TICKERS)).start()   # a session for that thread
+    session = sessions.session()                                                   # this thread's session
+
+Every session only ever talks to localhost:9999, so each adapter keeps one host pool sized for the requests
+that thread can have in flight.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_MAXSIZE = 4
+
+
+def tune(session, pool_maxsize=POOL_MAXSIZE):
+    """Mount a keep-alive adapter sized for a single API host. No transport retries: orders must not be resent."""
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class SessionPool:
+    """
+    headers: API key header(s) for every session
+    session_class: requests.Session or a subclass (e.g. InstrumentedSession). None means whatever
+        requests.Session is when each session is made, so a wrapper that swaps it in (instrument.py,
+        recorder.py, host.py) still applies
+    pool_maxsize: keep-alive connections per session
+    """
+    def __init__(self, headers, session_class=None, pool_maxsize=POOL_MAXSIZE):
+        self.headers = dict(headers)
+        self.session_class = session_class
+        self.pool_maxsize = pool_maxsize
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.sessions = []
+
+    # a fresh session to hand to one thread
+    def new(self):
+        session = tune((self.session_class or requests.Session)(), self.pool_maxsize)
+        session.headers.update(self.headers)
+        with self.lock:
+            self.sessions.append(session)
+        return session
+
+    # the calling thread's own session, created on first use
+    def session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = self.new()
+        return session
+
+    def close(self):
+        with self.lock:
+            sessions, self.sessions = self.sessions, []
+        for session in sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
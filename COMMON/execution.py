@@ -0,0 +1,126 @@
+"""
+Tender Unwind Execution
+Works a large position out through market orders sized by the visible book instead of a fixed split.
+
+Each round reads /securities/book and sends one child order of the liquidity resting within `tolerance` of the
+touch (capped at the case's max_trade_size). A deep book is taken in big clips back to back; a thin one gives
+small clips and a short pause for it to refill. The unwind stops once the touch has moved more than `max_cost`
+per share against the touch it started from, or past a hard `limit` price (e.g. the tender's break-even),
+leaving the rest for the caller.
+
+    engine = UnwindEngine(session, order_gateway(session))
+    report = engine.unwind('HAWK', 100000, 'SELL', limit=24.52)
+    print(report)         # filled, vwap, arrival, cost vs arrival, children, seconds, stop reason
+"""
+
+import time
+
+from book import book_side, get_book
+from gateway import UNWIND
+
+TOLERANCE = 0.05        # price levels within this of the touch count as takeable liquidity
+MAX_COST = 0.25         # stop once the touch is this far (per share) through the arrival touch
+MIN_CHILD = 1000        # below this the book is too thin, wait for it to refill
+MAX_CHILD = 10000       # max_trade_size
+REFILL_WAIT = 0.1       # pause when the book is thin
+MAX_SECONDS = 30
+
+
+class UnwindEngine:
+    """
+    session: API session for book reads
+    gateway: OrderGateway used for the child orders (sent at UNWIND priority)
+    exclude: callable returning our own resting order ids, so we don't count (or hit) our own quotes
+    """
+    def __init__(self, session, gateway, tolerance=TOLERANCE, max_cost=MAX_COST, min_child=MIN_CHILD,
+                 max_child=MAX_CHILD, refill_wait=REFILL_WAIT, max_seconds=MAX_SECONDS, exclude=None):
+        self.session = session
+        self.gateway = gateway
+        self.tolerance = tolerance
+        self.max_cost = max_cost
+        self.min_child = min_child
+        self.max_child = max_child
+        self.refill_wait = refill_wait
+        self.max_seconds = max_seconds
+        self.exclude = exclude or (lambda: ())
+        self.reports = []
+
+    def liquidity(self, prices, sizes, action):
+        """Shares resting within tolerance of the touch."""
+        if not len(prices):
+            return 0
+        edge = prices[0] + self.tolerance if action == 'BUY' else prices[0] - self.tolerance
+        within = prices <= edge if action == 'BUY' else prices >= edge
+        return int(sizes[within].sum())
+
+    def unwind(self, ticker, quantity, action, stop=None, limit=None):
+        """
+        Trade `quantity` of `ticker` with market orders (action BUY or SELL). Blocks until done, the cost cap
+        or `limit` (worst touch price to trade at) is hit, max_seconds pass or stop() is true.
+        Returns the unwind report.
+        """
+        start = time.monotonic()
+        sign = 1 if action == 'BUY' else -1
+        book = get_book(self.session, ticker)
+        arrival = self.touch(book, action, set(self.exclude()))
+        remaining = int(abs(quantity))
+        filled, notional, children = 0, 0.0, 0
+        reason = 'done'
+
+        while remaining > 0:
+            if stop is not None and stop():
+                reason = 'stopped'
+                break
+            if time.monotonic() - start > self.max_seconds:
+                reason = 'timeout'
+                break
+            prices, sizes = book_side(book, action, set(self.exclude()))
+            if arrival is not None and len(prices) and sign * (prices[0] - arrival) > self.max_cost:
+                reason = 'cost cap'
+                break
+            if limit is not None and len(prices) and sign * (prices[0] - limit) > 0:
+                reason = 'limit'
+                break
+
+            child = min(remaining, self.liquidity(prices, sizes, action), self.max_child)
+            if child < min(self.min_child, remaining):
+                time.sleep(self.refill_wait)
+            else:
+                try:
+                    result = self.gateway.submit(ticker, child, action, slice_size=self.max_child,
+                                                 priority=UNWIND).result()
+                except Exception as e:
+                    print(f'{ticker} unwind child failed: {e!r}')
+                    result = {'acks': []}
+                children += 1
+                for ack in result['acks']:
+                    done = ack.get('quantity_filled') or 0
+                    filled += done
+                    notional += done * (ack.get('vwap') or 0)
+                    remaining -= done
+                if not result['acks']:
+                    time.sleep(self.refill_wait)
+            book = get_book(self.session, ticker)
+
+        vwap = notional / filled if filled else None
+        # positive cost = worse than arrival (paid up to buy, sold down to sell)
+        cost = sign * (notional - arrival * filled) if arrival is not None and filled else 0.0
+        report = {'ticker': ticker, 'action': action, 'quantity': int(abs(quantity)), 'filled': filled,
+                  'remaining': remaining, 'arrival': arrival, 'vwap': vwap, 'cost': cost,
+                  'cost_per_share': cost / filled if filled else 0.0, 'children': children,
+                  'seconds': time.monotonic() - start, 'reason': reason}
+        self.reports.append(report)
+        return report
+
+    # best price a market order with this action would trade at, None on an empty side
+    @staticmethod
+    def touch(book, action, exclude=()):
+        prices = book_side(book, action, exclude)[0]
+        return float(prices[0]) if len(prices) else None
+
+
+def format_report(report):
+    return (f"{report['action']} {report['ticker']}: {report['filled']}/{report['quantity']} in {report['children']} "
+            f"orders over {report['seconds']:.1f}s, vwap {report['vwap'] or 0:.4f} vs arrival "
+            f"{report['arrival'] or 0:.4f}, cost {report['cost']:.2f} ({report['cost_per_share']:.4f}/sh), "
+            f"{report['reason']}")
@@ -0,0 +1,296 @@
+"""
+Order Gateway
+Pipelined order submission for every case.
+
+market_order / limit_order used to POST one POSITION_SIZE slice at a time and ignore the responses.
+The gateway splits a parent order into slices, sends them concurrently from a pool of keep-alive
+connections while staying inside each ticker's api_orders_per_second, records the ack or reject of every
+slice, and hands back a future for the parent order.
+
+    gateway = order_gateway(session)
+    parent = gateway.submit('RITC', 100000, 'SELL')       # returns immediately
+    result = parent.result()                              # {'order_ids': [...], 'acks': [...], 'rejects': [...], ...}
+
+Every slice is queued on the gateway's OrderScheduler with a priority (UNWIND, RISK or QUOTE), so threads sharing
+the gateway share one order budget and urgent work jumps the queue:
+
+    gateway.submit('HAWK', 50000, 'BUY', priority=UNWIND)
+
+With a RiskGate attached (gateway.set_risk) each parent order is clipped to the case limits before it is sliced;
+the clipped amount is reported as result['clipped'].
+
+The pool is built on requests + threads (the scripts' existing stack) rather than a separate async client;
+asyncio code can await a parent order with asyncio.wrap_future.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from api import API_URL
+from connection import SessionPool
+
+DEFAULT_ORDERS_PER_SECOND = 10
+MAX_RETRIES = 3
+REJECT_HISTORY = 1000   # most recent rejects kept on the gateway for inspection
+
+# order priorities, lower goes first
+UNWIND = 0      # closing out an accepted tender
+RISK = 1        # anything that reduces a position
+QUOTE = 2       # passive requotes
+
+
+class OrderScheduler:
+    """
+    Central queue for order work across every thread that shares a gateway.
+
+    Each ticker has a token bucket refilled at its api_orders_per_second and holding at most one token, so
+    child orders go out evenly spaced and never exceed the server's one-second window. Queued work is released
+    highest priority first (lowest number, then arrival order) as soon as its ticker has a token: a tender
+    unwind never waits behind a queue of requotes, and nothing sleeps while budget is unused.
+    clock / pause are swapped for the replay clock by COMMON/recorder.py in --fast replays.
+    """
+    clock = staticmethod(time.monotonic)
+    def __init__(self, rates=None, default=DEFAULT_ORDERS_PER_SECOND):
+        self.rates = dict(rates or {})
+        self.default = default
+        self.execution_delay = {}
+        self.buckets = {}
+        self.queues = defaultdict(list)
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+
+    def rate(self, ticker):
+        return self.rates.get(ticker, self.default)
+
+    def put(self, ticker, priority, job):
+        with self.cond:
+            heapq.heappush(self.queues[ticker], (priority, next(self.counter), job))
+            self.cond.notify()
+
+    # after a 429 the ticker gets no tokens until the server's wait has passed
+    def drain(self, ticker, wait):
+        with self.cond:
+            self.buckets[ticker] = (-wait * self.rate(ticker), self.clock())
+
+    def tokens(self, ticker, now):
+        tokens, stamp = self.buckets.get(ticker, (1.0, now))
+        return min(1.0, tokens + (now - stamp) * self.rate(ticker))
+
+    def next_job(self):
+        """Block until some queued job may be sent, take its token and return it."""
+        with self.cond:
+            while True:
+                now = self.clock()
+                best, wait = None, None
+                for ticker, queue in self.queues.items():
+                    if not queue:
+                        continue
+                    tokens = self.tokens(ticker, now)
+                    if tokens >= 1.0 - 1e-9:
+                        if best is None or queue[0][:2] < self.queues[best][0][:2]:
+                            best = ticker
+                    else:
+                        until = (1.0 - tokens) / self.rate(ticker)
+                        wait = until if wait is None else min(wait, until)
+                if best is not None:
+                    self.buckets[best] = (self.tokens(best, now) - 1.0, now)
+                    return heapq.heappop(self.queues[best])[2]
+                self.pause(wait)
+
+    # called with cond held: until a put() or the next token, whichever comes first
+    def wait_for_tokens(self, wait):
+        self.cond.wait(wait)
+
+    pause = wait_for_tokens
+
+
+class OrderGateway:
+    """
+    headers: API key header(s) for the gateway's own connections
+    max_workers: concurrent order POSTs in flight
+    slice_size: default child order size (the case max_trade_size)
+    rates: api_orders_per_second per ticker, read from /securities when not given
+    session_class: class of the gateway's own sessions, order_gateway() passes the caller's
+    """
+    def __init__(self, headers, max_workers=16, slice_size=10000, rates=None, session_class=None):
+        self.headers = dict(headers)
+        self.slice_size = slice_size
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='order_gateway')
+        # one connection per pool thread, each thread only ever has one order in flight
+        self.sessions = SessionPool(self.headers, session_class, pool_maxsize=1)
+        self.scheduler = OrderScheduler(rates)
+        self.limits_loaded = rates is not None
+        self.lock = threading.Lock()
+        self.rejects = deque(maxlen=REJECT_HISTORY)
+        self.listeners = []
+        self.risk = None
+        self.dispatcher = threading.Thread(target=self.dispatch, name='order_scheduler', daemon=True)
+        self.dispatcher.start()
+
+    # listener(ack) is called from the pool thread for every accepted child order
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    # pre-trade check for every order, see COMMON/risk.py
+    def set_risk(self, risk):
+        self.risk = risk
+
+    # every pool thread keeps its own keep-alive connection
+    def session(self):
+        return self.sessions.session()
+
+    def load_limits(self):
+        with self.lock:
+            if self.limits_loaded:
+                return
+            self.limits_loaded = True
+        resp = self.session().get(f'{API_URL}/securities')
+        if resp.ok:
+            with self.scheduler.cond:
+                for security in resp.json():
+                    if security.get('api_orders_per_second'):
+                        self.scheduler.rates[security['ticker']] = security['api_orders_per_second']
+                    self.scheduler.execution_delay[security['ticker']] = security.get('execution_delay_ms', 0) / 1000
+
+    # seconds the server holds an order on this ticker before it reaches the book
+    def execution_delay(self, ticker):
+        self.load_limits()
+        return self.scheduler.execution_delay.get(ticker, 0)
+
+    def slices(self, quantity, slice_size):
+        quantity = int(abs(quantity))
+        slice_size = max(int(slice_size), 1)
+        full, remainder = divmod(quantity, slice_size)
+        return [slice_size] * full + ([remainder] if remainder else [])
+
+    def submit(self, ticker, quantity, action, order_type='MARKET', price=None, slice_size=None, priority=RISK):
+        """Queue a parent order as child slices. Returns a Future of the parent result."""
+        self.load_limits()
+        quantity = int(abs(quantity))
+        allowed = self.risk.reserve(ticker, action, quantity) if self.risk is not None else quantity
+        sizes = self.slices(allowed, slice_size or self.slice_size)
+        parent = Future()
+        result = {'ticker': ticker, 'action': action, 'type': order_type, 'price': price,
+                  'requested': quantity, 'clipped': quantity - allowed, 'order_ids': [], 'acks': [], 'rejects': []}
+        if not sizes:
+            if quantity:
+                result['rejects'].append(({'ticker': ticker, 'action': action, 'quantity': quantity}, None, 'risk limit'))
+            parent.set_result(result)
+            return parent
+
+        pending = [len(sizes)]
+        lock = threading.Lock()
+
+        def child_done(ack, reject, error=None):
+            with lock:
+                if ack is not None:
+                    result['order_ids'].append(ack['order_id'])
+                    result['acks'].append(ack)
+                if reject is not None:
+                    result['rejects'].append(reject)
+                if error is not None:
+                    result.setdefault('error', error)
+                pending[0] -= 1
+                done = pending[0] == 0
+            if done:
+                if 'error' in result:
+                    parent.set_exception(result['error'])
+                else:
+                    parent.set_result(result)
+
+        for size in sizes:
+            params = {'ticker': ticker, 'type': order_type, 'quantity': size, 'action': action}
+            if order_type == 'LIMIT':
+                params['price'] = price
+            self.queue(params, priority, child_done)
+        return parent
+
+    def queue(self, params, priority, done, attempt=0):
+        self.scheduler.put(params['ticker'], priority, lambda: self.send(params, priority, done, attempt))
+
+    def dispatch(self):
+        while True:
+            job = self.scheduler.next_job()
+            try:
+                self.pool.submit(job)
+            except RuntimeError:
+                # pool shut down (close() or interpreter exit)
+                return
+
+    # runs on a pool thread: whatever happens, `done` is called exactly once and the reservation is settled
+    def send(self, params, priority, done, attempt):
+        settled = False     # reservation handed to risk.on_ack, released, or kept for a retry
+        finished = False
+        try:
+            try:
+                resp = self.session().post(f'{API_URL}/orders', params=params)
+            except requests.RequestException as e:
+                settled = finished = True
+                return self.reject(done, (params, None, str(e)))
+            if resp.ok:
+                # the order is live from here on: whatever the handlers do, the caller gets its order id
+                ack = resp.json()
+                settled = True
+                if self.risk is not None:
+                    self.notify(self.risk.on_ack, ack)
+                for listener in self.listeners:
+                    self.notify(listener, ack)
+                finished = True
+                return done(ack, None)
+            body = resp.json() if resp.headers.get('Content-Type', '').startswith('application/json') else resp.text
+            if resp.status_code == 429 and attempt < MAX_RETRIES:
+                # back in the queue at the same priority once the server's window has passed
+                self.scheduler.drain(params['ticker'], body.get('wait', 0.1) if isinstance(body, dict) else 0.1)
+                settled = finished = True
+                return self.queue(params, priority, done, attempt + 1)
+            settled = finished = True
+            self.reject(done, (params, resp.status_code, body))
+        except Exception as e:
+            if not finished:
+                finished = True
+                with self.lock:
+                    self.rejects.append((params, None, repr(e)))
+                done(None, (params, None, repr(e)), e)
+        finally:
+            if not settled and self.risk is not None:
+                self.risk.release(params['ticker'], params['action'], params['quantity'])
+
+    # a failing ack handler is logged, it must not turn an order the server accepted into a reject
+    @staticmethod
+    def notify(handler, ack):
+        try:
+            handler(ack)
+        except Exception as e:
+            print(f"order {ack.get('order_id')}: ack handler {handler!r} failed: {e!r}")
+
+    def reject(self, done, reject):
+        params = reject[0]
+        if self.risk is not None:
+            self.risk.release(params['ticker'], params['action'], params['quantity'])
+        with self.lock:
+            self.rejects.append(reject)
+        done(None, reject)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.sessions.close()
+
+
+GATEWAYS = {}
+GATEWAYS_LOCK = threading.Lock()
+
+
+# one gateway per API key, so library functions that only receive a session can share it.
+# Its connections are the same kind as the caller's (e.g. InstrumentedSession), so order POSTs are measured too.
+def order_gateway(session, **kwargs):
+    key = tuple(sorted(session.headers.items()))
+    with GATEWAYS_LOCK:
+        if key not in GATEWAYS:
+            kwargs.setdefault('session_class', type(session))
+            GATEWAYS[key] = OrderGateway(session.headers, **kwargs)
+        return GATEWAYS[key]
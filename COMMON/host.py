@@ -0,0 +1,212 @@
+"""
+Strategy Host
+Runs several strategy scripts as separate processes on one shared market-data feed.
+
+    python COMMON/host.py --key GITHUB "MM ALGO/algo.py" ETF/ETF_1.py "VOLATILITY/Volatility Python Script.py"
+
+The host process is the only one polling /case and /securities. Every poll is written into a ring buffer of
+fixed-layout records in shared memory (one slot per snapshot, all the numeric per-ticker fields), and each
+script runs in its own interpreter with requests.Session patched so GET /case and GET /securities are served
+from the newest slot instead of the network. Everything else (orders, tenders, news, book) still goes to the
+server. Pricing in one strategy no longer holds the GIL for the others, and API load from market data stays
+one feed no matter how many strategies run.
+
+All strategies see the positions of the host's API key (--key), so run them under the same trader.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+from multiprocessing import shared_memory
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import requests
+from api import fetch
+
+FIELDS = ['position', 'vwap', 'nlv', 'last', 'bid', 'bid_size', 'ask', 'ask_size', 'volume', 'total_volume',
+          'realized', 'unrealized']
+INT_FIELDS = {'position', 'bid_size', 'ask_size', 'volume', 'total_volume'}
+STATUSES = ['ACTIVE', 'PAUSED', 'STOPPED']
+SLOTS = 64
+FEED_INTERVAL = 0.1
+
+
+# ---------- SHARED MEMORY RING ------------ #
+def record_dtype(tickers):
+    return np.dtype([('seq', 'i8'), ('time', 'f8'), ('tick', 'i8'), ('period', 'i8'), ('status', 'i8'),
+                     ('values', 'f8', (len(tickers), len(FIELDS)))])
+
+
+class SharedFeed:
+    """
+    Single writer, many readers. The header holds the sequence number of the newest complete slot; a slot's own
+    seq is set to -1 while it is written. Readers check the slot's seq before and after copying it (a seqlock), so
+    a copy the writer lapped the ring into is thrown away and read again.
+    """
+    def __init__(self, shm, tickers, slots, static_case, static_securities, owner=False):
+        self.shm = shm
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.slots = slots
+        self.static_case = static_case
+        self.static_securities = static_securities
+        self.owner = owner
+        self.head = np.ndarray((1,), dtype='i8', buffer=shm.buf)
+        self.ring = np.ndarray((slots,), dtype=record_dtype(self.tickers), buffer=shm.buf, offset=8)
+
+    @classmethod
+    def create(cls, case, securities, slots=SLOTS):
+        tickers = [s['ticker'] for s in securities]
+        size = 8 + slots * record_dtype(tickers).itemsize
+        feed = cls(shared_memory.SharedMemory(create=True, size=size), tickers, slots,
+                   {k: v for k, v in case.items() if k not in ('tick', 'period', 'status')},
+                   {s['ticker']: {k: v for k, v in s.items() if k not in FIELDS} for s in securities}, owner=True)
+        feed.head[0] = -1
+        feed.ring['seq'] = -1
+        feed.write(case, securities)
+        return feed
+
+    # everything a worker needs to attach, all picklable
+    def describe(self):
+        return self.shm.name, self.tickers, self.slots, self.static_case, self.static_securities
+
+    @classmethod
+    def attach(cls, name, tickers, slots, static_case, static_securities):
+        return cls(shared_memory.SharedMemory(name=name), tickers, slots, static_case, static_securities)
+
+    def write(self, case, securities):
+        seq = int(self.head[0]) + 1
+        slot = self.ring[seq % self.slots]
+        slot['seq'] = -1
+        slot['time'] = time.time()
+        slot['tick'] = case['tick']
+        slot['period'] = case.get('period', 1)
+        slot['status'] = STATUSES.index(case['status']) if case.get('status') in STATUSES else -1
+        values = slot['values']
+        for s in securities:
+            row = self.index.get(s['ticker'])
+            if row is not None:
+                values[row] = [np.nan if s.get(field) is None else s[field] for field in FIELDS]
+        slot['seq'] = seq
+        self.head[0] = seq
+
+    def read(self):
+        """Newest complete snapshot as (seq, record copy), or (-1, None) before the first write."""
+        while True:
+            seq = int(self.head[0])
+            if seq < 0:
+                return -1, None
+            slot = self.ring[seq % self.slots]
+            if int(slot['seq']) != seq:
+                continue
+            record = slot.copy()
+            # the copy's own seq was taken before its payload, so check the shared slot again now it is done
+            if int(self.ring[seq % self.slots]['seq']) == seq:
+                return seq, record
+
+    def case(self, record):
+        status = int(record['status'])
+        return dict(self.static_case, tick=int(record['tick']), period=int(record['period']),
+                    status=STATUSES[status] if status >= 0 else None)
+
+    def securities(self, record, ticker=None):
+        tickers = self.tickers if ticker is None else [t for t in self.tickers if t == ticker]
+        out = []
+        for t in tickers:
+            security = dict(self.static_securities[t])
+            for field, value in zip(FIELDS, record['values'][self.index[t]]):
+                value = float(value)
+                security[field] = None if np.isnan(value) else (int(value) if field in INT_FIELDS else value)
+            out.append(security)
+        return out
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ---------- WORKER SIDE ------------ #
+class FeedResponse:
+    def __init__(self, body):
+        self.status_code = 200
+        self.ok = True
+        self.body = body
+        self.headers = {'Content-Type': 'application/json'}
+
+    def json(self):
+        return self.body
+
+    @property
+    def text(self):
+        return json.dumps(self.body)
+
+
+class FeedSession(requests.Session):
+    feed = None
+
+    def request(self, method, url, params=None, **kwargs):
+        if method.upper() == 'GET' and self.feed is not None:
+            parts = urlsplit(url)
+            endpoint = parts.path.split('/v1/', 1)[-1].strip('/')
+            query = dict(parse_qsl(parts.query), **(params or {}))
+            if endpoint in ('case', 'securities') and set(query) <= {'ticker'}:
+                seq, record = self.feed.read()
+                if record is not None:
+                    if endpoint == 'case':
+                        return FeedResponse(self.feed.case(record))
+                    return FeedResponse(self.feed.securities(record, query.get('ticker')))
+        return super().request(method, url, params=params, **kwargs)
+
+
+def run_worker(script, description):
+    FeedSession.feed = SharedFeed.attach(*description)
+    requests.Session = FeedSession
+    script = os.path.abspath(script)
+    sys.path.insert(0, os.path.dirname(script))
+    sys.argv = [script]
+    try:
+        runpy.run_path(script, run_name='__main__')
+    finally:
+        FeedSession.feed.close()
+
+
+# ---------- HOST ------------ #
+def run_host(scripts, api_key, interval=FEED_INTERVAL, slots=SLOTS):
+    with requests.Session() as session:
+        session.headers.update({'X-API-Key': api_key})
+        feed = SharedFeed.create(fetch(session, 'case'), fetch(session, 'securities'), slots)
+        workers = [multiprocessing.Process(target=run_worker, args=(script, feed.describe()),
+                                           name=os.path.basename(script)) for script in scripts]
+        try:
+            for worker in workers:
+                worker.start()
+            while any(worker.is_alive() for worker in workers):
+                start = time.monotonic()
+                feed.write(fetch(session, 'case'), fetch(session, 'securities'))
+                time.sleep(max(interval - (time.monotonic() - start), 0))
+        finally:
+            for worker in workers:
+                worker.join()
+            feed.close()
+        return {worker.name: worker.exitcode for worker in workers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run strategy scripts as processes on one shared market-data feed')
+    parser.add_argument('scripts', nargs='+')
+    parser.add_argument('--key', required=True, help='API key the feed polls with')
+    parser.add_argument('--interval', type=float, default=FEED_INTERVAL, help='seconds between feed polls')
+    parser.add_argument('--slots', type=int, default=SLOTS)
+    args = parser.parse_args()
+    for name, code in run_host(args.scripts, args.key, args.interval, args.slots).items():
+        print(f'{name}: exit {code}')
+
+
+if __name__ == '__main__':
+    main()
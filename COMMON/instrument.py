@@ -0,0 +1,164 @@
+"""
+Request Instrumentation
+Latency histograms and call accounting for the shared HTTP session.
+
+Use the session directly:
+    session = InstrumentedSession()
+    ...
+    print(session.stats.summary())
+or wrap any script unchanged and get the summary when it exits:
+    python COMMON/instrument.py "MM ALGO/algo.py"
+
+Per (method, endpoint) it keeps an HDR-style histogram of wall-clock latency, and it counts calls per tick, per
+strategy thread (threading name) and rate-limit (429) responses. stats.counters() is safe to read from any
+thread while the strategies run.
+"""
+
+import os
+import re
+import runpy
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+class LatencyHistogram:
+    """
+    Log-linear buckets in the style of HdrHistogram: values (microseconds) below 64 are exact, above that each
+    power of two is split into 32 buckets, so any percentile is within ~3% of the true value at constant memory.
+    """
+    SUB_BUCKETS = 32
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def bucket(self, value):
+        if value < 2 * self.SUB_BUCKETS:
+            return 0, value
+        shift = value.bit_length() - 6
+        return shift, value >> shift
+
+    def record(self, value):
+        value = max(int(value), 0)
+        self.counts[self.bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0
+        target = pct / 100 * self.count
+        seen = 0
+        for (shift, mantissa) in sorted(self.counts, key=lambda b: b[1] << b[0]):
+            seen += self.counts[(shift, mantissa)]
+            if seen >= target:
+                low = mantissa << shift
+                return min(low + ((1 << shift) - 1) // 2, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+
+class RequestStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(LatencyHistogram)
+        self.per_tick = defaultdict(int)
+        self.per_thread = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.tick = None
+        self.start = time.monotonic()
+
+    def record(self, method, url, status, micros, body=None):
+        endpoint = ID_SEGMENT.sub('/{id}', urlsplit(url).path.split('/v1', 1)[-1])
+        key = f'{method} {endpoint}'
+        with self.lock:
+            if endpoint == '/case' and isinstance(body, dict) and 'tick' in body:
+                self.tick = (body.get('period', 1), body['tick'])
+            self.histograms[key].record(micros)
+            self.per_tick[self.tick] += 1
+            self.per_thread[threading.current_thread().name] += 1
+            if status == 429:
+                self.throttled[key] += 1
+            elif status >= 400:
+                self.errors[key] += 1
+
+    # live view, cheap enough to poll from a monitoring thread
+    def counters(self):
+        with self.lock:
+            return {
+                'calls': sum(h.count for h in self.histograms.values()),
+                'tick': self.tick,
+                'calls_this_tick': self.per_tick.get(self.tick, 0),
+                'per_thread': dict(self.per_thread),
+                'throttled': sum(self.throttled.values()),
+                'errors': sum(self.errors.values()),
+            }
+
+    def summary(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.start
+            lines = [f'{"endpoint":<32}{"calls":>8}{"429":>6}{"err":>6}{"mean ms":>10}{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}']
+            for key, h in sorted(self.histograms.items(), key=lambda item: -item[1].total):
+                lines.append(f'{key:<32}{h.count:>8}{self.throttled.get(key, 0):>6}{self.errors.get(key, 0):>6}'
+                             f'{h.mean() / 1000:>10.2f}{h.percentile(50) / 1000:>9.2f}{h.percentile(90) / 1000:>9.2f}'
+                             f'{h.percentile(99) / 1000:>9.2f}{h.max / 1000:>9.2f}')
+            total = sum(h.count for h in self.histograms.values())
+            ticks = [n for tick, n in self.per_tick.items() if tick is not None]
+            lines.append('')
+            lines.append(f'{total} calls in {elapsed:.1f}s, {total / elapsed if elapsed else 0:.1f}/s')
+            if ticks:
+                lines.append(f'calls per tick: mean {sum(ticks) / len(ticks):.1f}, max {max(ticks)} over {len(ticks)} ticks')
+            for name, n in sorted(self.per_thread.items(), key=lambda item: -item[1]):
+                lines.append(f'  {name}: {n} calls')
+            return '\n'.join(lines)
+
+
+class InstrumentedSession(requests.Session):
+    # shared by every session in the process unless a script gives one its own
+    stats = RequestStats()
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        resp = super().request(method, url, *args, **kwargs)
+        micros = (time.perf_counter() - start) * 1e6
+        body = None
+        if '/case' in url and resp.ok:
+            try:
+                body = resp.json()
+            except ValueError:
+                pass
+        self.stats.record(method.upper(), url, resp.status_code, micros, body)
+        return resp
+
+
+def main():
+    if len(sys.argv) < 2:
+        print('usage: python COMMON/instrument.py <script.py>')
+        return
+    script = os.path.abspath(sys.argv[1])
+    requests.Session = InstrumentedSession
+    sys.path.insert(0, os.path.dirname(script))
+    sys.argv = sys.argv[1:]
+    try:
+        runpy.run_path(script, run_name='__main__')
+    finally:
+        print(InstrumentedSession.stats.summary())
+
+
+if __name__ == '__main__':
+    main()
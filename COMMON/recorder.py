@@ -0,0 +1,443 @@
+"""
+Record and Replay
+Captures every RIT REST response a strategy script sees and feeds the capture back to any script offline.
+
+Record a live heat:
+    python COMMON/recorder.py record heat1.ritlog "MM ALGO/algo.py"
+Replay it at real speed, or as fast as the script can consume it:
+    python COMMON/recorder.py replay heat1.ritlog "CAPM ALGO/main.py"
+    python COMMON/recorder.py replay heat1.ritlog "ETF/ETF_1.py" --fast
+
+The scripts are run unchanged: requests.Session is swapped for a recording / replaying session before they start.
+
+File format: one compact JSON object per line, appended as responses arrive.
+    {"stream": 3, "m": "GET", "e": "securities", "p": {}}      declares a stream (method + endpoint + params)
+    {"t": 12.5031, "k": 3, "s": 200, "f": [...]}               full body, first response of a stream
+    {"t": 12.7544, "k": 3, "s": 200, "d": {...}}               delta against the previous body of the stream
+Deltas hold only the fields that changed: lists are diffed record by record on their id field
+(ticker, news_id, tender_id, order_id), dicts field by field. Fields that disappear are listed under 'del'.
+
+Order traffic can't be matched against a capture, so on replay every order is acknowledged like the RIT
+client would: market orders fill at the captured touch, limit orders rest. In --fast replays the gateway's
+rate pacing runs on the replay clock.
+"""
+
+import argparse
+import bisect
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from gateway import OrderScheduler
+
+# id field used to diff list responses record by record
+KEY_FIELDS = {'securities': 'ticker', 'news': 'news_id', 'tenders': 'tender_id', 'orders': 'order_id',
+              'limits': 'name', 'assets': 'ticker'}
+MISSING = object()
+REAL_SLEEP = time.sleep
+
+
+class ReplayFinished(BaseException):
+    # BaseException so the strategies' own `except Exception` blocks don't swallow the end of the capture
+    pass
+
+
+class ReplayMismatch(LookupError):
+    # the script asked for something the capture only holds for other params (e.g. another ticker's book)
+    pass
+
+
+def split_url(url, params=None):
+    parts = urlsplit(url)
+    path = parts.path
+    endpoint = path.split('/v1/', 1)[1] if '/v1/' in path else path.lstrip('/')
+    merged = dict(parse_qsl(parts.query))
+    if params:
+        merged.update({k: v for k, v in params.items() if v is not None})
+    return endpoint, {k: str(v) for k, v in merged.items()}
+
+
+def key_field(endpoint, body):
+    field = KEY_FIELDS.get(endpoint.split('/')[0])
+    if field and isinstance(body, list) and all(isinstance(r, dict) and field in r for r in body):
+        return field
+    return None
+
+
+# ---------- DELTA ENCODING ------------ #
+def encode_delta(prev, curr, endpoint):
+    if isinstance(prev, dict) and isinstance(curr, dict):
+        return {'set': {k: v for k, v in curr.items() if prev.get(k, MISSING) != v},
+                'del': [k for k in prev if k not in curr]}
+
+    field = key_field(endpoint, prev)
+    if field is None or key_field(endpoint, curr) != field:
+        return None
+
+    prev_by_key = {r[field]: r for r in prev}
+    updates = []
+    deleted = []
+    for record in curr:
+        old = prev_by_key.get(record[field])
+        if old is None:
+            updates.append(record)
+        elif old != record:
+            changed = {k: v for k, v in record.items() if old.get(k, MISSING) != v}
+            changed[field] = record[field]
+            updates.append(changed)
+            gone = [k for k in old if k not in record]
+            if gone:
+                deleted.append([record[field], gone])
+
+    delta = {'upd': updates}
+    if deleted:
+        delta['del'] = deleted
+    keys = [r[field] for r in curr]
+    if keys != list(prev_by_key):
+        delta['keys'] = keys
+    return delta
+
+
+def apply_delta(prev, delta, endpoint):
+    if 'set' in delta:
+        body = dict(prev)
+        body.update(delta['set'])
+        for k in delta['del']:
+            body.pop(k, None)
+        return body
+
+    field = KEY_FIELDS[endpoint.split('/')[0]]
+    by_key = {r[field]: r for r in prev}
+    for record in delta['upd']:
+        by_key[record[field]] = {**by_key.get(record[field], {}), **record}
+    for key, gone in delta.get('del', []):
+        by_key[key] = {k: v for k, v in by_key[key].items() if k not in gone}
+    keys = delta.get('keys', [r[field] for r in prev])
+    return [by_key[k] for k in keys]
+
+
+# ---------- RECORD ------------ #
+class Recorder:
+    """
+    Append-only writer shared by every session in the process.
+    News is folded into one accumulated book so captures made with `since` polling replay for any reader.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'a')
+        self.start = time.monotonic()
+        self.lock = threading.Lock()
+        self.streams = {}
+        self.last = {}
+        self.news = {}
+
+    def record(self, method, url, params, resp):
+        endpoint, params = split_url(url, params)
+        try:
+            body = resp.json()
+        except ValueError:
+            body = resp.text
+
+        with self.lock:
+            t = round(time.monotonic() - self.start, 4)
+            if method == 'GET' and endpoint == 'news' and isinstance(body, list):
+                for item in body:
+                    self.news[item['news_id']] = item
+                body = sorted(self.news.values(), key=lambda item: item['news_id'], reverse=True)
+                params = {}
+
+            stream_key = (method, endpoint, tuple(sorted(params.items())))
+            stream = self.streams.get(stream_key)
+            if stream is None:
+                stream = len(self.streams)
+                self.streams[stream_key] = stream
+                self.write({'stream': stream, 'm': method, 'e': endpoint, 'p': params})
+
+            line = {'t': t, 'k': stream, 's': resp.status_code}
+            prev = self.last.get(stream, MISSING)
+            delta = None if prev is MISSING or method != 'GET' else encode_delta(prev, body, endpoint)
+            if delta is None:
+                line['f'] = body
+            else:
+                line['d'] = delta
+            self.last[stream] = body
+            self.write(line)
+
+    def write(self, line):
+        self.file.write(json.dumps(line, separators=(',', ':')) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class RecordingSession(requests.Session):
+    recorder = None
+
+    def request(self, method, url, params=None, **kwargs):
+        resp = super().request(method, url, params=params, **kwargs)
+        self.recorder.record(method.upper(), url, params, resp)
+        return resp
+
+
+# ---------- REPLAY ------------ #
+class ReplayClock:
+    """
+    Replay time in seconds since the start of the capture.
+
+    realtime: follows the wall clock.
+    fast: only moves when the script sleeps, or jumps to the next recorded /case response when the script polls
+    the case again without sleeping, so busy loops and sleepy loops both run as fast as they can.
+    """
+    def __init__(self, realtime):
+        self.realtime = realtime
+        self.start = time.monotonic()
+        self.virtual = 0.0
+        self.slept = True
+        self.lock = threading.Lock()
+
+    def now(self):
+        if self.realtime:
+            return time.monotonic() - self.start
+        return self.virtual
+
+    def sleep(self, seconds):
+        if self.realtime:
+            REAL_SLEEP(seconds)
+            return
+        with self.lock:
+            self.virtual += max(seconds, 0)
+            self.slept = True
+
+    def case_polled(self, next_time):
+        if self.realtime:
+            return
+        with self.lock:
+            if not self.slept:
+                self.virtual = max(self.virtual, next_time if next_time is not None else float('inf'))
+            self.slept = False
+
+
+class Replay:
+    """Loads a capture and answers 'what did the server return for this request at time t'."""
+    def __init__(self, path, realtime=True):
+        self.clock = ReplayClock(realtime)
+        self.streams = {}
+        self.times = {}
+        self.bodies = {}
+        self.submitted = []
+        self.order_id = 0
+        self.finished = False
+        self.lock = threading.Lock()
+        self.load(path)
+
+    def load(self, path):
+        defs = {}
+        last = {}
+        with open(path) as f:
+            for raw in f:
+                line = json.loads(raw)
+                if 'stream' in line:
+                    key = (line['m'], line['e'], tuple(sorted(line['p'].items())))
+                    defs[line['stream']] = key
+                    self.streams[key] = line['stream']
+                    self.times[line['stream']] = []
+                    self.bodies[line['stream']] = []
+                    continue
+                stream = line['k']
+                if 'f' in line:
+                    body = line['f']
+                else:
+                    body = apply_delta(last[stream], line['d'], defs[stream][1])
+                last[stream] = body
+                self.times[stream].append(line['t'])
+                self.bodies[stream].append((line['s'], body))
+
+        case = self.streams.get(('GET', 'case', ()))
+        self.case_times = self.times[case] if case is not None else []
+        self.end = self.case_times[-1] if self.case_times else max((t[-1] for t in self.times.values() if t), default=0)
+
+    def find_stream(self, method, endpoint, params):
+        """
+        The stream recorded for this request. Paging params (limit, since) may differ, a ticker may not: asking for a
+        ticker the capture never saw raises ReplayMismatch instead of replaying some other ticker's data.
+        None when the endpoint was never captured at all.
+        """
+        stream = self.streams.get((method, endpoint, tuple(sorted(params.items()))))
+        if stream is not None:
+            return stream
+        candidates = [(p, s) for (m, e, p), s in self.streams.items() if m == method and e == endpoint]
+        if not candidates:
+            return None
+        matching = [s for p, s in candidates if dict(p).get('ticker') == params.get('ticker')]
+        if not matching:
+            raise ReplayMismatch(f'{method} {endpoint} {params} not in capture')
+        return min(matching)
+
+    # data recorded between two /case polls belongs to the earlier one, so a snapshot taken right after
+    # a case poll sees the same securities / news the live script saw on that tick
+    def lookup(self, method, endpoint, params, now):
+        stream = self.find_stream(method, endpoint, params)
+        if stream is None:
+            return 404, {'code': 'NOT_FOUND', 'message': f'{endpoint} not in capture'}
+        if endpoint == 'case':
+            i = bisect.bisect_right(self.times[stream], now) - 1
+        else:
+            next_case = bisect.bisect_right(self.case_times, now)
+            horizon = self.case_times[next_case] if next_case < len(self.case_times) else float('inf')
+            i = bisect.bisect_left(self.times[stream], horizon) - 1
+        return self.bodies[stream][max(i, 0)]
+
+    def get(self, endpoint, params):
+        if endpoint == 'case':
+            i = bisect.bisect_right(self.case_times, self.clock.now())
+            self.clock.case_polled(self.case_times[i] if i < len(self.case_times) else None)
+            if self.clock.now() > self.end:
+                self.finished = True
+        # once the capture runs out every reader stops, including strategy threads that never poll the case
+        if self.finished:
+            raise ReplayFinished()
+
+        status, body = self.lookup('GET', endpoint, {} if endpoint == 'news' else params, self.clock.now())
+        if endpoint == 'news' and isinstance(body, list):
+            since = int(params.get('since', 0))
+            body = [item for item in body if item['news_id'] > since]
+            if 'limit' in params:
+                body = body[:int(params['limit'])]
+        return status, body
+
+    # last captured body of a stream at the current replay time, None when it wasn't captured
+    def latest(self, endpoint):
+        try:
+            status, body = self.lookup('GET', endpoint, {}, self.clock.now())
+        except ReplayMismatch:
+            return None
+        return body if status == 200 else None
+
+    def ack(self, params):
+        """An order shaped like the RIT client's: market orders fill at the captured touch, limit orders rest."""
+        self.order_id += 1
+        case = self.latest('case') or {}
+        quantity = int(float(params.get('quantity', 0)))
+        price = float(params['price']) if params.get('price') else None
+        market = params.get('type', 'MARKET') == 'MARKET'
+        vwap = None
+        if market:
+            securities = self.latest('securities') or []
+            security = next((s for s in securities if s['ticker'] == params.get('ticker')), None)
+            if security is not None:
+                vwap = security['ask'] if params.get('action') == 'BUY' else security['bid']
+        return {'order_id': self.order_id, 'period': case.get('period', 1), 'tick': case.get('tick', 0),
+                'trader_id': 'replay', 'ticker': params.get('ticker'), 'type': params.get('type', 'MARKET'),
+                'quantity': quantity, 'action': params.get('action'), 'price': price,
+                'quantity_filled': quantity if market else 0, 'vwap': vwap,
+                'status': 'TRANSACTED' if market else 'OPEN'}
+
+    # order traffic can't be matched against the capture, acknowledge it and keep it for inspection
+    def submit(self, method, endpoint, params):
+        with self.lock:
+            self.submitted.append((self.clock.now(), method, endpoint, params))
+            if method == 'POST' and endpoint == 'orders':
+                return 200, self.ack(params)
+            if endpoint.startswith('commands/cancel'):
+                return 200, {'cancelled_order_ids': []}
+            return 200, {'success': True}
+
+
+class ReplayResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    @property
+    def text(self):
+        return json.dumps(self.body)
+
+
+class ReplaySession(requests.Session):
+    replay = None
+
+    def request(self, method, url, params=None, **kwargs):
+        method = method.upper()
+        endpoint, params = split_url(url, params)
+        if method == 'GET':
+            return ReplayResponse(*self.replay.get(endpoint, params))
+        return ReplayResponse(*self.replay.submit(method, endpoint, params))
+
+
+# ---------- DRIVER ------------ #
+
+def run_script(script):
+    script = os.path.abspath(script)
+    sys.path.insert(0, os.path.dirname(script))
+    sys.argv = [script]
+    runpy.run_path(script, run_name='__main__')
+
+
+def record(capture, script):
+    RecordingSession.recorder = Recorder(capture)
+    requests.Session = RecordingSession
+    try:
+        run_script(script)
+    finally:
+        RecordingSession.recorder.close()
+
+
+# --fast order pacing: jump the replay clock to the next token instead of waiting for it, then let other
+# threads queue work before the scheduler looks again
+def fast_pause(scheduler, wait):
+    if wait is None:
+        return scheduler.cond.wait()
+    time.sleep(wait)
+    scheduler.cond.wait(0)
+
+
+def replay(capture, script, realtime=True):
+    ReplaySession.replay = Replay(capture, realtime)
+    requests.Session = ReplaySession
+    clock = ReplaySession.replay.clock
+    time.sleep = clock.sleep
+    if not realtime:
+        # order pacing keeps the server's per-second budget in replay time, not wall time
+        OrderScheduler.clock = staticmethod(clock.now)
+        OrderScheduler.pause = fast_pause
+    try:
+        run_script(script)
+    except ReplayFinished:
+        pass
+    finally:
+        time.sleep = REAL_SLEEP
+        OrderScheduler.clock = staticmethod(time.monotonic)
+        OrderScheduler.pause = OrderScheduler.wait_for_tokens
+    print(f'Replay finished: {len(ReplaySession.replay.submitted)} order requests sent by {script}')
+    return ReplaySession.replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record or replay RIT REST API sessions')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record')
+    rec.add_argument('capture')
+    rec.add_argument('script')
+    rep = sub.add_parser('replay')
+    rep.add_argument('capture')
+    rep.add_argument('script')
+    rep.add_argument('--fast', action='store_true', help='run as fast as possible instead of real speed')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.capture, args.script)
+    else:
+        replay(args.capture, args.script, realtime=not args.fast)
+
+
+if __name__ == '__main__':
+    main()
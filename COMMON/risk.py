@@ -0,0 +1,197 @@
+"""
+Pre-trade Risk Gate
+Keeps running gross and net exposure per case limit and clips every outgoing order to what the limits allow.
+
+Exposure is worst case: a ticker counts as max(|position + resting buys|, |position - resting sells|) units
+against gross, and net is checked against both position + every resting buy and position - every resting
+sell. An order only changes its own ticker's numbers, so a check is a handful of arithmetic per limit the
+ticker belongs to, independent of how many tickers or orders there are. Orders that don't add exposure always
+pass, so positions over a limit (a big tender) can still be worked down.
+
+    gate = RiskGate.from_session(session)
+    order_gateway(session).set_risk(gate)     # every order the gateway sends is now reserved / clipped
+
+    since = gate.marker()                     # before fetching, so acks that race the fetch aren't lost
+    gate.sync(positions, open_orders, since)
+"""
+
+import threading
+from collections import defaultdict, deque
+
+from api import fetch
+
+JOURNAL_SIZE = 10000    # acks / fills kept for sync() to carry over, far more than a second of orders
+
+
+class RiskGate:
+    """
+    limits: {limit name: (gross_limit, net_limit)}
+    units: {ticker: [(limit name, units per share), ...]} as in each security's 'limits' field
+    """
+    def __init__(self, limits, units):
+        self.limits = dict(limits)
+        self.units = {ticker: list(entries) for ticker, entries in units.items()}
+        self.lock = threading.Lock()
+        self.inflight = defaultdict(int)    # reserved by the gateway, not acked yet, per (ticker, action)
+        self.seq = 0
+        self.journal = deque(maxlen=JOURNAL_SIZE)   # (seq, ticker, action, quantity) a sync may not see yet
+        self.reset()
+
+    @classmethod
+    def from_session(cls, session):
+        limits = {l['name']: (l['gross_limit'], l['net_limit']) for l in fetch(session, 'limits')}
+        securities = fetch(session, 'securities')
+        units = {s['ticker']: [(l['name'], l.get('units', 1)) for l in s.get('limits') or [] if l['name'] in limits]
+                 for s in securities}
+        gate = cls(limits, units)
+        since = gate.marker()
+        gate.sync({s['ticker']: s['position'] for s in securities}, fetch(session, 'orders', status='OPEN'), since)
+        return gate
+
+    def reset(self):
+        self.position = defaultdict(int)
+        self.buys = defaultdict(int)
+        self.sells = defaultdict(int)
+        self.orders = {}
+        self.gross = defaultdict(float)     # worst-case gross per limit
+        self.net = defaultdict(float)       # position net per limit
+        self.long = defaultdict(float)      # resting buys per limit
+        self.short = defaultdict(float)     # resting sells per limit
+
+    def exposure(self, ticker):
+        p = self.position[ticker]
+        return max(abs(p + self.buys[ticker]), abs(p - self.sells[ticker]))
+
+    def apply(self, ticker, position=0, buys=0, sells=0):
+        before = self.exposure(ticker)
+        self.position[ticker] += position
+        self.buys[ticker] += buys
+        self.sells[ticker] += sells
+        change = self.exposure(ticker) - before
+        for name, units in self.units.get(ticker, ()):
+            self.gross[name] += units * change
+            self.net[name] += units * position
+            self.long[name] += units * buys
+            self.short[name] += units * sells
+
+    # resting quantity on one side, negative to take it off
+    def rest(self, ticker, action, quantity):
+        if action == 'BUY':
+            self.apply(ticker, buys=quantity)
+        else:
+            self.apply(ticker, sells=quantity)
+
+    def allowed(self, ticker, action, quantity):
+        """Largest part of the order the limits allow, without reserving it."""
+        quantity = int(abs(quantity))
+        p, b, s = self.position[ticker], self.buys[ticker], self.sells[ticker]
+        current = max(abs(p + b), abs(p - s))
+        for name, units in self.units.get(ticker, ()):
+            if not units:
+                continue
+            gross_limit, net_limit = self.limits[name]
+            # this ticker's exposure may grow to whatever the other tickers leave of the gross limit
+            room = max((gross_limit - self.gross[name]) / units + current, current)
+            if action == 'BUY':
+                cap = min(room - (p + b), (net_limit - self.net[name] - self.long[name]) / units)
+            else:
+                cap = min(room - (s - p), (net_limit + self.net[name] - self.short[name]) / units)
+            quantity = min(quantity, max(int(cap), 0))
+        return quantity
+
+    # ----- order lifecycle -----
+    def reserve(self, ticker, action, quantity):
+        """Clip the order to the limits and count it as resting. Returns the quantity that may be sent."""
+        with self.lock:
+            quantity = self.allowed(ticker, action, quantity)
+            if quantity:
+                self.rest(ticker, action, quantity)
+                self.inflight[ticker, action] += quantity
+            return quantity
+
+    def unreserve(self, ticker, action, quantity):
+        """Take up to `quantity` off the in-flight reservation, never below zero. Returns what was taken."""
+        quantity = min(quantity, self.inflight[ticker, action])
+        self.inflight[ticker, action] -= quantity
+        self.rest(ticker, action, -quantity)
+        return quantity
+
+    def release(self, ticker, action, quantity):
+        with self.lock:
+            self.unreserve(ticker, action, quantity)
+
+    def on_ack(self, ack):
+        """A reserved child order reached the server: fills move to position, the rest stays resting or is freed."""
+        with self.lock:
+            ticker, action = ack['ticker'], ack['action']
+            filled = ack.get('quantity_filled') or 0
+            unfilled = ack['quantity'] - filled
+            keep = unfilled if ack.get('status') == 'OPEN' else 0
+            self.unreserve(ticker, action, ack['quantity'])
+            self.rest(ticker, action, keep)
+            self.apply(ticker, position=filled if action == 'BUY' else -filled)
+            if keep:
+                self.orders[ack['order_id']] = [ticker, action, keep]
+            self.record(ticker, action, ack['quantity'])
+
+    def on_cancel(self, order_ids):
+        with self.lock:
+            for order_id in order_ids:
+                order = self.orders.pop(order_id, None)
+                if order is not None:
+                    ticker, action, remaining = order
+                    self.rest(ticker, action, -remaining)
+
+    def on_fill(self, ticker, action, quantity):
+        with self.lock:
+            self.apply(ticker, position=quantity if action == 'BUY' else -quantity)
+            self.record(ticker, action, quantity)
+
+    def record(self, ticker, action, quantity):
+        self.seq += 1
+        self.journal.append((self.seq, ticker, action, quantity))
+
+    def marker(self):
+        """Take before fetching the positions and open orders for sync()."""
+        with self.lock:
+            return self.seq
+
+    def sync(self, positions, open_orders, since=None):
+        """
+        Rebuild from the server's positions and open orders (e.g. on every OrderMirror reconcile). Orders still
+        in flight stay reserved on top, since neither list knows about them yet. So do acks and fills recorded
+        after `since` (a marker() taken before the fetch): the fetch may have missed them, so they are reserved
+        on their side until a later sync's fetch is sure to include them. None when nothing can have raced it.
+        """
+        with self.lock:
+            while self.journal and (since is None or self.journal[0][0] <= since):
+                self.journal.popleft()
+            self.reset()
+            for ticker, position in positions.items():
+                self.apply(ticker, position=position)
+            for o in open_orders:
+                remaining = o['quantity'] - (o.get('quantity_filled') or 0)
+                self.rest(o['ticker'], o['action'], remaining)
+                self.orders[o['order_id']] = [o['ticker'], o['action'], remaining]
+            for (ticker, action), quantity in self.inflight.items():
+                self.rest(ticker, action, quantity)
+            for _, ticker, action, quantity in self.journal:
+                self.rest(ticker, action, quantity)
+
+    def copy(self):
+        """Independent gate with the same limits and state, for what-if checks."""
+        with self.lock:
+            gate = RiskGate(self.limits, self.units)
+            for name in ('position', 'buys', 'sells', 'gross', 'net', 'long', 'short'):
+                getattr(gate, name).update(getattr(self, name))
+            gate.orders = {order_id: list(order) for order_id, order in self.orders.items()}
+            gate.inflight.update(self.inflight)
+            gate.seq = self.seq
+            gate.journal = deque(self.journal, maxlen=JOURNAL_SIZE)
+            return gate
+
+    def summary(self):
+        with self.lock:
+            return {name: {'gross': self.gross[name], 'net': self.net[name], 'resting_buys': self.long[name],
+                           'resting_sells': self.short[name], 'gross_limit': gross, 'net_limit': net}
+                    for name, (gross, net) in self.limits.items()}
@@ -0,0 +1,590 @@
+"""
+RIT Stand-in Server
+Self-contained stand-in for the RIT client's REST API so strategies can be load-tested without a live case.
+
+    python COMMON/rit_server.py --case mm --latency-ms 15 --orders-per-second 10 --execution-delay-ms 250
+    python "MM ALGO/algo.py"
+
+Serves http://localhost:9999/v1 with the endpoints the scripts use:
+    GET    case, securities, securities/book, news, tenders, orders, limits
+    POST   orders, tenders/{id}, commands/cancel
+    DELETE orders/{id}, tenders/{id}
+
+The market is a random walk per ticker with a synthetic depth ladder that refills every tick. Market orders walk
+the ladder, limit orders rest and fill when the market trades through them. Injected costs:
+    --latency-ms / --jitter-ms     delay added to every request
+    --orders-per-second            api_orders_per_second, order POSTs over the limit get a 429 with a 'wait' hint
+    --execution-delay-ms           execution_delay_ms, the speed bump applied before an order is processed
+Only the standard library is used so this runs on any plain Linux box.
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+# ---------- CASE PRESETS ------------ #
+def option_tickers():
+    tickers = {'RTM': 50.0}
+    for month in (1, 2):
+        for strike in range(45, 55):
+            tickers[f'RTM{month}C{strike}'] = None
+            tickers[f'RTM{month}P{strike}'] = None
+    return tickers
+
+
+PRESETS = {
+    'mm': {'tickers': {'HAWK': 20.0, 'DOVE': 30.0, 'RIT_C': 25.0, 'RIT_U': 25.0}, 'ticks': 300, 'periods': 1,
+           'half_spread': 0.1, 'vol': 0.004, 'limits': (250000, 150000), 'tenders': True, 'news': None},
+    'etf': {'tickers': {'RITC': 25.0, 'COMP': 25.0}, 'ticks': 600, 'periods': 1, 'half_spread': 0.02,
+            'vol': 0.002, 'limits': (300000, 200000), 'tenders': True, 'news': None},
+    'capm': {'tickers': {'RITM': 25.0, 'ALPHA': 20.0, 'GAMMA': 30.0, 'THETA': 15.0}, 'ticks': 600, 'periods': 1,
+             'half_spread': 0.02, 'vol': 0.002, 'limits': (500000, 300000), 'tenders': False, 'news': 'capm',
+             'betas': {'ALPHA': 0.6, 'GAMMA': 1.1, 'THETA': 1.7}},
+    'vol': {'tickers': option_tickers(), 'ticks': 300, 'periods': 2, 'half_spread': 0.02, 'vol': 0.2,
+            'limits': (2500, 1000), 'tenders': False, 'news': 'vol'},
+}
+
+# fields every security record carries, the volatility scripts drop these by name so they must all exist
+STATIC_FIELDS = {
+    'currency': 'CAD', 'is_tradeable': True, 'is_shortable': True, 'interest_rate': 0, 'start_period': 1,
+    'stop_period': 2, 'description': '', 'display_unit': 'Share', 'min_price': 0, 'max_price': 1000,
+    'quoted_decimals': 2, 'limit_order_rebate': 0.0, 'min_trade_size': 0, 'required_tickers': None,
+    'underlying_tickers': None, 'bond_coupon': 0, 'interest_payments_per_period': 0, 'base_security': '',
+    'fixing_ticker': None, 'interest_rate_ticker': None, 'otc_price_range': 0,
+}
+
+
+def norm_cdf(x):
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def black_scholes(s, k, t, sigma, is_call):
+    if t <= 0:
+        return max(s - k, 0) if is_call else max(k - s, 0)
+    d1 = (math.log(s / k) + 0.5 * sigma ** 2 * t) / (sigma * math.sqrt(t))
+    d2 = d1 - sigma * math.sqrt(t)
+    if is_call:
+        return s * norm_cdf(d1) - k * norm_cdf(d2)
+    return k * norm_cdf(-d2) - s * norm_cdf(-d1)
+
+
+class ApiError(Exception):
+    def __init__(self, status, code, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.body = {'code': code, 'message': message, **extra}
+
+
+# ---------- MARKET ------------ #
+class Security:
+    def __init__(self, ticker, price, half_spread, multiplier=1, max_trade_size=10000, fee=0.02):
+        self.ticker = ticker
+        self.mid = price
+        self.half_spread = half_spread
+        self.multiplier = multiplier
+        self.max_trade_size = max_trade_size
+        self.fee = fee
+        self.start_price = price
+        self.last = price
+        self.volume = 0
+        self.total_volume = 0
+        self.position = 0
+        self.avg_cost = 0.0
+        self.realized = 0.0
+        self.bids = []
+        self.asks = []
+
+    def record(self, server):
+        bid = self.bids[0][0] if self.bids else round(self.mid - self.half_spread, 2)
+        ask = self.asks[0][0] if self.asks else round(self.mid + self.half_spread, 2)
+        unrealized = (self.last - self.avg_cost) * self.position * self.multiplier
+        is_option = self.multiplier != 1
+        return {
+            'ticker': self.ticker, 'type': 'OPTION' if is_option else 'STOCK', 'size': self.multiplier,
+            'position': self.position, 'vwap': self.avg_cost, 'nlv': self.position * self.last * self.multiplier,
+            'last': self.last, 'bid': bid, 'bid_size': self.bids[0][1] if self.bids else 0,
+            'ask': ask, 'ask_size': self.asks[0][1] if self.asks else 0, 'volume': self.volume,
+            'total_volume': self.total_volume, 'realized': round(self.realized, 2), 'unrealized': round(unrealized, 2),
+            'unit_multiplier': self.multiplier, 'start_price': self.start_price, 'trading_fee': self.fee,
+            'max_trade_size': self.max_trade_size, 'api_orders_per_second': server.orders_per_second,
+            'execution_delay_ms': server.execution_delay_ms,
+            'limits': [{'name': 'LIMIT-STOCK', 'units': 1}], **STATIC_FIELDS,
+        }
+
+    def fill(self, action, quantity, price, fee=0.0):
+        signed = quantity if action == 'BUY' else -quantity
+        if self.position == 0 or (self.position > 0) == (signed > 0):
+            total = abs(self.position) + quantity
+            self.avg_cost = (self.avg_cost * abs(self.position) + price * quantity) / total
+        else:
+            closing = min(quantity, abs(self.position))
+            direction = 1 if self.position > 0 else -1
+            self.realized += closing * (price - self.avg_cost) * direction * self.multiplier
+            if quantity > abs(self.position):
+                self.avg_cost = price
+        self.position += signed
+        self.realized -= fee * quantity * self.multiplier
+        self.last = price
+        self.volume += quantity
+        self.total_volume += quantity
+
+
+class StandInServer:
+    """Holds the simulated case. All state changes happen under self.lock."""
+    def __init__(self, case='mm', tick_seconds=1.0, latency_ms=0.0, jitter_ms=0.0, orders_per_second=10,
+                 execution_delay_ms=0, depth=5000, levels=10, seed=None):
+        preset = PRESETS[case]
+        self.case = case
+        self.preset = preset
+        self.tick_seconds = tick_seconds
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.orders_per_second = orders_per_second
+        self.execution_delay_ms = execution_delay_ms
+        self.depth = depth
+        self.levels = levels
+        self.rng = random.Random(seed)
+        self.lock = threading.RLock()
+        self.period = 1
+        self.tick = 0
+        self.status = 'ACTIVE'
+        self.gross_limit, self.net_limit = preset['limits']
+        self.securities = {}
+        self.orders = {}
+        self.next_order_id = 1
+        self.tenders = {}
+        self.next_tender_id = 1
+        self.news = []
+        self.forward = None
+        self.sigma = preset['vol']
+        self.order_times = defaultdict(deque)
+        self.stats = defaultdict(int)
+
+        for ticker, price in preset['tickers'].items():
+            if price is None:
+                self.securities[ticker] = Security(ticker, 0.0, preset['half_spread'], multiplier=100, max_trade_size=100)
+            else:
+                self.securities[ticker] = Security(ticker, price, preset['half_spread'])
+        self.reprice_options()
+        for security in self.securities.values():
+            self.rebuild_book(security)
+        self.opening_news()
+
+    # ----- clock -----
+    # keeps serving the final state after the case stops so scripts can read their closing positions
+    def run_clock(self):
+        while True:
+            time.sleep(self.tick_seconds)
+            with self.lock:
+                if self.status == 'ACTIVE':
+                    self.advance()
+
+    def advance(self):
+        if self.tick >= self.preset['ticks']:
+            if self.period >= self.preset['periods']:
+                self.status = 'STOPPED'
+                return
+            self.period += 1
+            self.tick = 0
+        self.tick += 1
+        self.move_prices()
+        for security in self.securities.values():
+            self.rebuild_book(security)
+            security.volume = 0
+        self.match_resting()
+        self.expire_tenders()
+        if self.preset['tenders'] and self.rng.random() < 0.08:
+            self.new_tender()
+        if self.preset['news']:
+            self.periodic_news()
+
+    def elapsed_fraction(self):
+        total = self.preset['ticks'] * self.preset['periods']
+        return ((self.period - 1) * self.preset['ticks'] + self.tick) / total
+
+    def move_prices(self):
+        if self.case == 'vol':
+            rtm = self.securities['RTM']
+            step = self.sigma * math.sqrt(1 / 3600)
+            rtm.mid *= math.exp(self.rng.gauss(0, step))
+            rtm.last = round(rtm.mid, 2)
+            self.reprice_options()
+            return
+
+        tickers = list(self.securities)
+        market = self.securities[tickers[0]]
+        drift = 0.0
+        if self.forward is not None:
+            ticks_left = max(self.preset['ticks'] - self.tick, 1)
+            drift = math.log(self.forward / market.mid) / ticks_left
+        market_ret = drift + self.rng.gauss(0, self.preset['vol'])
+        betas = self.preset.get('betas', {})
+        for ticker in tickers:
+            security = self.securities[ticker]
+            if ticker == tickers[0]:
+                ret = market_ret
+            else:
+                ret = betas.get(ticker, 0.0) * market_ret + self.rng.gauss(0, self.preset['vol'])
+            security.mid = max(security.mid * math.exp(ret), 0.05)
+            security.last = round(security.mid + self.rng.uniform(-1, 1) * security.half_spread, 2)
+
+    def reprice_options(self):
+        if self.case != 'vol':
+            return
+        s = self.securities['RTM'].mid
+        for ticker, security in self.securities.items():
+            if ticker == 'RTM':
+                continue
+            month = int(ticker[3])
+            t = max(month / 12 - self.elapsed_fraction() * 2 / 12, 0)
+            security.mid = max(black_scholes(s, int(ticker[-2:]), t, self.sigma, ticker[4] == 'C'), 0.01)
+            security.last = round(security.mid, 2)
+
+    # synthetic depth ladder, one level per cent away from the touch
+    def rebuild_book(self, security):
+        bid = round(security.mid - security.half_spread, 2)
+        ask = round(security.mid + security.half_spread, 2)
+        size = self.depth if security.multiplier == 1 else max(self.depth // 100, 10)
+        security.bids = [[round(bid - i * 0.01, 2), int(size * self.rng.uniform(0.5, 1.5))] for i in range(self.levels)]
+        security.asks = [[round(ask + i * 0.01, 2), int(size * self.rng.uniform(0.5, 1.5))] for i in range(self.levels)]
+        security.bids = [level for level in security.bids if level[0] > 0]
+
+    # ----- orders -----
+    def walk_book(self, security, action, quantity, limit=None):
+        levels = security.asks if action == 'BUY' else security.bids
+        filled = 0
+        cost = 0.0
+        while levels and filled < quantity:
+            price, size = levels[0]
+            if limit is not None and ((action == 'BUY' and price > limit) or (action == 'SELL' and price < limit)):
+                break
+            take = min(size, quantity - filled)
+            filled += take
+            cost += take * price
+            if take == size:
+                levels.pop(0)
+            else:
+                levels[0][1] -= take
+        return filled, cost
+
+    def execute(self, order):
+        security = self.securities[order['ticker']]
+        remaining = order['quantity'] - order['quantity_filled']
+        limit = order['price'] if order['type'] == 'LIMIT' else None
+        filled, cost = self.walk_book(security, order['action'], remaining, limit)
+        if filled:
+            price = cost / filled
+            security.fill(order['action'], filled, price, fee=security.fee if order['type'] == 'MARKET' else 0.0)
+            prev = order['quantity_filled']
+            order['vwap'] = ((order['vwap'] or 0) * prev + cost) / (prev + filled)
+            order['quantity_filled'] = prev + filled
+        if order['quantity_filled'] >= order['quantity'] or order['type'] == 'MARKET':
+            order['status'] = 'TRANSACTED'
+
+    def match_resting(self):
+        for order in list(self.orders.values()):
+            if order['status'] != 'OPEN':
+                continue
+            security = self.securities[order['ticker']]
+            touch = security.bids[0][0] if order['action'] == 'BUY' and security.bids else None
+            if order['action'] == 'SELL' and security.asks:
+                touch = security.asks[0][0]
+            self.execute(order)
+            # passive fills for orders joining or improving the touch
+            if order['status'] == 'OPEN' and touch is not None and self.rng.random() < 0.3:
+                at_touch = order['price'] >= touch if order['action'] == 'BUY' else order['price'] <= touch
+                if at_touch:
+                    remaining = order['quantity'] - order['quantity_filled']
+                    take = min(remaining, int(self.depth * self.rng.uniform(0.05, 0.3)))
+                    if take:
+                        security.fill(order['action'], take, order['price'])
+                        prev = order['quantity_filled']
+                        order['vwap'] = ((order['vwap'] or 0) * prev + take * order['price']) / (prev + take)
+                        order['quantity_filled'] = prev + take
+                        if order['quantity_filled'] >= order['quantity']:
+                            order['status'] = 'TRANSACTED'
+
+    def check_rate(self, ticker):
+        now = time.monotonic()
+        times = self.order_times[ticker]
+        while times and now - times[0] >= 1.0:
+            times.popleft()
+        if len(times) >= self.orders_per_second:
+            wait = round(1.0 - (now - times[0]), 3)
+            self.stats['throttled'] += 1
+            raise ApiError(429, 'TOO_MANY_REQUESTS', 'API request rate limit exceeded.', wait=wait)
+        times.append(now)
+
+    def submit_order(self, params):
+        try:
+            ticker = params['ticker']
+            order_type = params['type'].upper()
+            quantity = int(float(params['quantity']))
+            action = params['action'].upper()
+            price = float(params['price']) if order_type == 'LIMIT' else None
+        except (KeyError, ValueError):
+            raise ApiError(400, 'INVALID_PARAMETER', 'ticker, type, quantity, action (and price for LIMIT) are required.')
+        if ticker not in self.securities:
+            raise ApiError(400, 'INVALID_PARAMETER', f'Unknown ticker {ticker}.')
+        if action not in ('BUY', 'SELL') or order_type not in ('MARKET', 'LIMIT') or quantity <= 0:
+            raise ApiError(400, 'INVALID_PARAMETER', 'Invalid order.')
+        if quantity > self.securities[ticker].max_trade_size:
+            raise ApiError(400, 'INVALID_PARAMETER', 'Order quantity exceeds max_trade_size.')
+
+        with self.lock:
+            if self.status != 'ACTIVE':
+                raise ApiError(400, 'CASE_NOT_ACTIVE', 'The case is not running.')
+            self.check_rate(ticker)
+
+        if self.execution_delay_ms:
+            time.sleep(self.execution_delay_ms / 1000)
+
+        with self.lock:
+            order = {'order_id': self.next_order_id, 'period': self.period, 'tick': self.tick, 'trader_id': 'trader',
+                     'ticker': ticker, 'type': order_type, 'quantity': quantity, 'action': action, 'price': price,
+                     'quantity_filled': 0, 'vwap': None, 'status': 'OPEN'}
+            self.next_order_id += 1
+            self.orders[order['order_id']] = order
+            self.execute(order)
+            self.stats['orders'] += 1
+            return dict(order)
+
+    def cancel(self, order_ids):
+        cancelled = []
+        for order_id in order_ids:
+            order = self.orders.get(order_id)
+            if order and order['status'] == 'OPEN':
+                order['status'] = 'CANCELLED'
+                cancelled.append(order_id)
+        return cancelled
+
+    # ----- tenders and news -----
+    def new_tender(self):
+        ticker = self.rng.choice(list(self.securities))
+        security = self.securities[ticker]
+        action = self.rng.choice(['BUY', 'SELL'])
+        fixed = self.case == 'mm' or self.rng.random() < 0.7
+        edge = self.rng.uniform(-0.05, 0.25)
+        price = security.mid - edge if action == 'BUY' else security.mid + edge
+        tender = {'tender_id': self.next_tender_id, 'period': self.period, 'tick': self.tick,
+                  'expires': self.tick + self.rng.randint(15, 30), 'caption': f'Institution wants to {action.lower()}',
+                  'quantity': self.rng.choice([20000, 50000, 80000, 100000]), 'action': action,
+                  'is_fixed_bid': fixed, 'price': round(price, 2) if fixed else None, 'ticker': ticker,
+                  'reserve': round(price, 2)}
+        self.next_tender_id += 1
+        self.tenders[tender['tender_id']] = tender
+
+    def expire_tenders(self):
+        for tender_id, tender in list(self.tenders.items()):
+            if tender['expires'] <= self.tick or tender['period'] != self.period:
+                del self.tenders[tender_id]
+
+    def accept_tender(self, tender_id, params):
+        tender = self.tenders.get(tender_id)
+        if tender is None:
+            raise ApiError(404, 'NOT_FOUND', 'Tender not found.')
+        price = tender['price']
+        if not tender['is_fixed_bid']:
+            if 'price' not in params:
+                raise ApiError(400, 'INVALID_PARAMETER', 'price is required for this tender.')
+            price = float(params['price'])
+            # competitive tenders only win when the bid beats the client's reserve (pays more when we buy)
+            better = price >= tender['reserve'] if tender['action'] == 'BUY' else price <= tender['reserve']
+            if not better:
+                del self.tenders[tender_id]
+                return {'success': False}
+        self.securities[tender['ticker']].fill(tender['action'], tender['quantity'], price)
+        del self.tenders[tender_id]
+        return {'success': True}
+
+    def add_news(self, headline, body):
+        self.news.append({'news_id': len(self.news) + 1, 'period': self.period, 'tick': self.tick,
+                          'ticker': '', 'headline': headline, 'body': body})
+
+    def opening_news(self):
+        if self.preset['news'] == 'capm':
+            self.add_news('Welcome', f'The risk free rate for this heat is {self.rng.uniform(1, 5):.2f}% per annum.')
+        elif self.preset['news'] == 'vol':
+            self.add_news('Risk Free Rate and Volatility',
+                          f'The risk free rate is 0% and the annualized realized volatility is {self.sigma * 100:.0f}% for this heat.')
+            self.add_news('Delta Limit', 'The delta limit for this heat is 7,000 and the penalty percentage is 1%.')
+
+    def periodic_news(self):
+        if self.preset['news'] == 'capm' and self.tick % 30 == 0:
+            market = self.securities[next(iter(self.securities))]
+            self.forward = round(market.mid * math.exp(self.rng.gauss(0, 0.02)), 2)
+            self.add_news(f'RITM forecast {self.tick}',
+                          f'Analysts expect RITM to trade at ${self.forward:.2f}.')
+        elif self.preset['news'] == 'vol' and self.tick % 75 == 0:
+            self.sigma = max(0.05, self.sigma + self.rng.uniform(-0.05, 0.05))
+            low = int(self.sigma * 100) - 2
+            self.add_news(f'News {self.tick}',
+                          f'Analysts believe realized volatility of RTM will be between {low}% ~ {low + 4}%, and will hold for the week.')
+        elif self.preset['news'] == 'vol' and self.tick % 75 == 37:
+            self.add_news(f'Announcement {self.tick}',
+                          f'The realized volatility of RTM is {self.sigma * 100:.0f}% for this week.')
+
+    # ----- REST -----
+    def handle(self, method, path, params):
+        parts = [p for p in path.split('/') if p]
+        if parts[:1] != ['v1']:
+            raise ApiError(404, 'NOT_FOUND', 'Unknown endpoint.')
+        parts = parts[1:]
+        endpoint = parts[0] if parts else ''
+        self.stats[f'{method} {endpoint}'] += 1
+
+        if method == 'POST' and parts == ['orders']:
+            return self.submit_order(params)
+
+        with self.lock:
+            if method == 'GET':
+                return self.get(parts, params)
+            if method == 'DELETE' and endpoint == 'orders' and len(parts) == 2:
+                return {'success': bool(self.cancel([int(parts[1])]))}
+            if method == 'POST' and endpoint == 'tenders' and len(parts) == 2:
+                return self.accept_tender(int(parts[1]), params)
+            if method == 'DELETE' and endpoint == 'tenders' and len(parts) == 2:
+                return {'success': self.tenders.pop(int(parts[1]), None) is not None}
+            if method == 'POST' and parts == ['commands', 'cancel']:
+                return {'cancelled_order_ids': self.cancel(self.cancel_targets(params))}
+        raise ApiError(404, 'NOT_FOUND', 'Unknown endpoint.')
+
+    def cancel_targets(self, params):
+        open_orders = [o for o in self.orders.values() if o['status'] == 'OPEN']
+        if params.get('all') in ('1', 'true', 'True'):
+            return [o['order_id'] for o in open_orders]
+        if 'ticker' in params:
+            return [o['order_id'] for o in open_orders if o['ticker'] == params['ticker']]
+        if 'ids' in params:
+            return [int(i) for i in params['ids'].split(',') if i]
+        raise ApiError(400, 'INVALID_PARAMETER', 'One of all, ticker or ids is required.')
+
+    def get(self, parts, params):
+        endpoint = '/'.join(parts)
+        if endpoint == 'case':
+            return {'name': f'RIT stand-in ({self.case})', 'period': self.period, 'tick': self.tick,
+                    'ticks_per_period': self.preset['ticks'], 'total_periods': self.preset['periods'],
+                    'status': self.status, 'is_enforce_trading_limits': True}
+        if endpoint == 'securities':
+            records = [s.record(self) for s in self.securities.values()]
+            if 'ticker' in params:
+                records = [r for r in records if r['ticker'] == params['ticker']]
+            return records
+        if endpoint == 'securities/book':
+            security = self.securities.get(params.get('ticker'))
+            if security is None:
+                raise ApiError(400, 'INVALID_PARAMETER', 'ticker is required.')
+            limit = int(params.get('limit', 20))
+            return {'bids': self.book_side(security, 'BUY', limit), 'asks': self.book_side(security, 'SELL', limit)}
+        if endpoint == 'news':
+            since = int(params.get('since', 0))
+            items = [n for n in reversed(self.news) if n['news_id'] > since]
+            return items[:int(params['limit'])] if 'limit' in params else items
+        if endpoint == 'tenders':
+            return [{k: v for k, v in t.items() if k != 'reserve'} for t in self.tenders.values()]
+        if endpoint == 'orders':
+            status = params.get('status', 'OPEN')
+            orders = [dict(o) for o in self.orders.values() if o['status'] == status]
+            if 'ticker' in params:
+                orders = [o for o in orders if o['ticker'] == params['ticker']]
+            return orders
+        if endpoint == 'limits':
+            gross = sum(abs(s.position) for s in self.securities.values())
+            net = sum(s.position for s in self.securities.values())
+            return [{'name': 'LIMIT-STOCK', 'gross': gross, 'net': net, 'gross_limit': self.gross_limit,
+                     'net_limit': self.net_limit, 'gross_fine': 0, 'net_fine': 0}]
+        raise ApiError(404, 'NOT_FOUND', 'Unknown endpoint.')
+
+    # synthetic ladder merged with our own resting orders, best price first
+    def book_side(self, security, action, limit):
+        levels = security.bids if action == 'BUY' else security.asks
+        entries = [{'order_id': 0, 'period': self.period, 'tick': self.tick, 'trader_id': 'ANON',
+                    'ticker': security.ticker, 'type': 'LIMIT', 'quantity': size, 'action': action, 'price': price,
+                    'quantity_filled': 0, 'vwap': None, 'status': 'OPEN'} for price, size in levels]
+        entries += [dict(o) for o in self.orders.values()
+                    if o['status'] == 'OPEN' and o['ticker'] == security.ticker and o['action'] == action]
+        entries.sort(key=lambda o: -o['price'] if action == 'BUY' else o['price'])
+        return entries[:limit]
+
+
+def make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def respond(self, method):
+            delay = server.latency_ms + server.rng.uniform(0, server.jitter_ms)
+            if delay:
+                time.sleep(delay / 1000)
+            parts = urlsplit(self.path)
+            params = dict(parse_qsl(parts.query))
+            headers = {}
+            if not self.headers.get('X-API-Key'):
+                status, body = 401, {'code': 'UNAUTHORIZED', 'message': 'API key missing.'}
+            else:
+                try:
+                    status, body = 200, server.handle(method, parts.path, params)
+                except ApiError as e:
+                    status, body = e.status, e.body
+                    if status == 429:
+                        headers['Retry-After'] = str(body['wait'])
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self.respond('GET')
+
+        def do_POST(self):
+            self.respond('POST')
+
+        def do_DELETE(self):
+            self.respond('DELETE')
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the RIT REST API')
+    parser.add_argument('--case', choices=sorted(PRESETS), default='mm')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--tick-seconds', type=float, default=1.0)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--orders-per-second', type=int, default=10)
+    parser.add_argument('--execution-delay-ms', type=int, default=0)
+    parser.add_argument('--depth', type=int, default=5000, help='shares per synthetic book level')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = StandInServer(args.case, args.tick_seconds, args.latency_ms, args.jitter_ms, args.orders_per_second,
+                           args.execution_delay_ms, args.depth, seed=args.seed)
+    httpd = ThreadingHTTPServer(('localhost', args.port), make_handler(server))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f'RIT stand-in ({args.case}) on http://localhost:{args.port}/v1')
+
+    try:
+        server.run_clock()
+    except KeyboardInterrupt:
+        pass
+    httpd.shutdown()
+    print(json.dumps(dict(server.stats), indent=2))
+
+
+if __name__ == '__main__':
+    main()
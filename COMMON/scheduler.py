@@ -0,0 +1,80 @@
+"""
+Tick Scheduler
+Replaces `while get_tick(session) < 600: ... sleep(x)` loops with callbacks that fire once per new tick.
+"""
+
+import time
+from api import ApiException, API_URL
+
+
+class TickScheduler:
+    """
+    Polls /v1/case and runs the registered callbacks once per tick transition.
+
+    The poll interval adapts to the measured tick length: right after a transition the scheduler sleeps
+    until just before the next tick is due, then polls every min_interval until it arrives.
+    While the case is not ACTIVE it backs off to max_interval.
+
+    Callbacks registered with on_data are run whenever their fetched data changes, polled at the same cadence.
+    """
+    def __init__(self, session, min_interval=0.02, max_interval=0.25):
+        self.session = session
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.tick_callbacks = []
+        self.watchers = []
+        self.last_tick = None
+        self.last_change = None
+        self.tick_length = None
+
+    def on_tick(self, callback):
+        self.tick_callbacks.append(callback)
+        return callback
+
+    # fetch(session) is polled between ticks, callback(data) runs when key(data) changes
+    def on_data(self, fetch, callback, key=None):
+        self.watchers.append({'fetch': fetch, 'callback': callback, 'key': key or (lambda data: data), 'last': None})
+        return callback
+
+    def get_case(self):
+        resp = self.session.get(f'{API_URL}/case')
+        if resp.ok:
+            return resp.json()
+        raise ApiException('fail - cant get tick')
+
+    # runs until stop(case) is true, returns the case that stopped it
+    def run(self, stop):
+        while True:
+            case = self.get_case()
+            if stop(case):
+                return case
+
+            tick = (case['period'], case['tick'])
+            if tick != self.last_tick:
+                self.record_transition(tick, time.monotonic())
+                for callback in self.tick_callbacks:
+                    callback(case)
+
+            for watcher in self.watchers:
+                data = watcher['fetch'](self.session)
+                key = watcher['key'](data)
+                if key != watcher['last']:
+                    watcher['last'] = key
+                    watcher['callback'](data)
+
+            time.sleep(self.next_interval(case, time.monotonic()))
+
+    def record_transition(self, tick, now):
+        if self.last_tick is not None and tick[0] == self.last_tick[0] and tick[1] > self.last_tick[1]:
+            elapsed = (now - self.last_change) / (tick[1] - self.last_tick[1])
+            self.tick_length = elapsed if self.tick_length is None else 0.8 * self.tick_length + 0.2 * elapsed
+        self.last_tick = tick
+        self.last_change = now
+
+    def next_interval(self, case, now):
+        if case.get('status', 'ACTIVE') != 'ACTIVE':
+            return self.max_interval
+        if self.tick_length is None:
+            return self.min_interval
+        remaining = self.last_change + self.tick_length - now
+        return min(self.max_interval, max(self.min_interval, remaining - self.min_interval))
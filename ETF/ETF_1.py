@@ -1,21 +1,17 @@
 
-import signal
+import os
+import sys
 import requests
-from time import sleep
 import pandas as pd
+from monitor import TICKERS, DepthFeatures, direction, securities_columns, spread_pct
 
-def Bidask_percentage(row):
-    a = row['ask']
-    b = row['bid']
-    percentage = (a - b) * 100 / ((a + b) / 2)
-    return percentage
-
-def Market_depth_ratio(row):
-    a_s = row['ask_size']
-    b_s = row['bid_size']
-    ratio = a_s / b_s
-    return ratio
-
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from api import fetch
+from arbitrage import BasketArbitrage, format_signal
+from risk import RiskGate
+from scheduler import TickScheduler
+from tender_bid import FillModel
+from tender_book import TenderBook, make_decision
 
 
 class ApiException(Exception):
@@ -23,13 +19,8 @@ class ApiException(Exception):
 
 API_KEY = {'X-API-Key': 'ASDFGH12'}
 shutdown = False
-
-def get_tick(session):
-    resp = session.get('http://localhost:9999/v1/case')
-    if resp.ok:
-        case = resp.json()
-        return case['tick']
-    raise ApiException('fail - cant get tick')
+FEE = 0.02  # per share on market orders
+TENDER_CAPTURES = []  # recorder captures of past heats, the competitive-bid fill model is fitted on their tender bids
 
 def get_securities(session):
     book = session.get('http://localhost:9999/v1/securities')
@@ -54,86 +45,64 @@ def tender_pnl(row, quantity):
     else:
         return 0    
     
-class MarketDepthTracker:
-    def __init__(self):
-        self.previous_market_depth = {}
-    
-    def get_market_depth_slope(self, row):
-        ticker = row.name
-        current_market_depth = row['ask_size'] / row['bid_size']
-        slope = 0
-        
-        if ticker in self.previous_market_depth:
-            previous_market_depth = self.previous_market_depth[ticker]
-            slope = (current_market_depth - previous_market_depth) / 0.5  # Assuming the time step is 0.2 seconds
-        self.previous_market_depth[ticker] = current_market_depth
-        return slope
-
 def main():
     with requests.Session() as session:
         session.headers.update(API_KEY)
-        etf = pd.DataFrame(columns=['position', 'last', 'bid_size', 'bid', 'ask', 'ask_size', 'volume'], index=['RITC', 'COMP'])
-        market_depth_tracker = MarketDepthTracker()
-        while get_tick(session) < 600 and not shutdown:
-            if get_tick(session) == 0:
+        tickers = list(TICKERS)
+        depth_features = DepthFeatures()
+        # both ETFs trade in one currency and the case has no converter, so edges are measured from the rolling mean
+        arbitrage = BasketArbitrage('RITC', {'COMP': 1})
+        tender_book = TenderBook(fee=FEE, margin=0.05, fill_model=FillModel.from_captures(TENDER_CAPTURES))
+        risk = RiskGate.from_session(session)
+        latest = {'tick': 0, 'securities': None}
+
+        # the book monitor runs on every quote change, not just once a tick, so the depth features see each update
+        def on_securities(securities):
+            latest['securities'] = securities
+            if latest['tick'] == 0:
+                return
+
+            # securities go straight into one array per column, one row per ticker
+            cols = securities_columns(securities, tickers)
+            cols['Spread(%)'] = spread_pct(cols['bid'], cols['ask'])
+            features = depth_features.update(cols)
+            cols['Imbalance'] = features['ew_imbalance']
+            cols['Imbalance Slope'] = features['slope']
+            cols['Microprice'] = features['microprice']
+            cols['Direction'] = direction(features['ew_imbalance'])
+
+            # Print the DataFrame with relevant columns
+            etf = pd.DataFrame(cols, index=tickers)
+            print(etf[['position', 'last',  'bid', 'ask', 'Microprice', 'Imbalance', 'Direction']].to_markdown(), end='\n'*2)
+
+            # RITC against its COMP basket, spread z-score against the rolling window
+            arb_signal = arbitrage.update({s['ticker']: s for s in securities})
+            if arb_signal:
+                print('Arbitrage:', format_signal(arb_signal))
+            elif arbitrage.spread is not None:
+                print(f'RITC-COMP spread {arbitrage.spread:.4f}, z {arbitrage.z:.2f}')
+
+        def on_tick(case):
+            latest['tick'] = case['tick']
+            if case['tick'] == 0:
                 print('Wait for Case')
-                sleep(1)
-            else:
-                securities = get_securities(session)
-                
-                for i in securities:
-                    etf.loc[i['ticker']] = pd.Series({'position': i['position'], 'last': i['last'], 'bid_size': i['bid_size'], 'bid': i['bid'], 'ask': i['ask'], 'ask_size': i['ask_size'], 'volume': i['volume']})
-                
-              
-               
-                # Retrieve tender offer data and add 'price' to DataFrame
-                tenders = get_tenders(session)
-                tender_prices = {}
-                ten_offer = {}
-                ten_type = {}
-                tender_quantity={}
-                for tender in tenders:
-                    ticker = tender['ticker']
-                    price = tender['price']
-                    ten_offer[ticker] = tender['action']
-                    ten_type[ticker] = tender['is_fixed_bid']
-                    tender_prices[ticker] = price
-                    tender_quantity[ticker]=tender['quantity']
-                etf['ten_offer'] = etf.index.map(ten_offer)
-                etf['ten_type'] = etf.index.map(ten_type)
-                etf['P_ten'] = etf.index.map(tender_prices)
-                etf['Quantity']=etf.index.map(tender_quantity)
-                # Define decision-making functions
-                
-                
-                def make_buy(row, margin = 0.05):
-                    if row['ten_offer'] == 'BUY': #they sell, we sell later
-                        if not row['ten_type']:
-                            return [row['bid'] - 0.3,row['bid']-0.02]
-                        else:
-                            return 'Take' if row['P_ten']+0.02+margin<row['bid'] else 'Decline'
-                    else:
-                        return 0
-                    
-                def make_sell(row, margin = 0.05):
-                    if row['ten_offer'] == 'SELL':# they buy, we buy later
-                        if not row['ten_type']:
-                            return [row['ask']+0.3,row['ask'] + 0.04],
-                        else:
-                            return 'Take' if row['P_ten'] +0.02+margin> row['ask'] else 'Decline'
-                    else:
-                        return 0
-                
-                # Apply decision-making functions based on the type of tender offer (BUY or SELL)
-                etf['Spread(%)'] = etf.apply(Bidask_percentage, axis=1)
-                etf['Mkt Dpt'] = etf.apply(Market_depth_ratio, axis=1)
-                etf['Market Depth Slope'] = etf.apply(market_depth_tracker.get_market_depth_slope, axis=1)
-                etf['Direction'] = etf.apply(lambda row: 'UP' if row['Mkt Dpt'] < 0.09 else ('Down' if row['Mkt Dpt'] > 10 else ''), axis=1)
-                etf['Decision'] = etf.apply(lambda row: make_buy(row,margin=0.05) if row['ten_offer'] == 'BUY' else make_sell(row,margin=0.05) if row['ten_offer'] == 'SELL' else '', axis=1)
-                # Print the DataFrame with relevant columns
-                print(etf[['position', 'last',  'bid', 'ask', 'Direction', 'P_ten','Quantity', 'Decision']].to_markdown(), end='\n'*2)
-                
-                sleep(0.5)
+                return
+
+            # every open tender, scored together and ranked against what the limits have left
+            securities = latest['securities'] or get_securities(session)
+            tender_book.update(get_tenders(session), case['tick'])
+            risk.sync({s['ticker']: s['position'] for s in securities if s['ticker'] in tickers}, fetch(session, 'orders', status='OPEN'))
+            scores = tender_book.score(session, risk, case['tick'])
+            if len(scores['tender_id']):
+                scores['Decision'] = make_decision(scores)
+                ranked = pd.DataFrame(scores)
+                print(ranked[['tender_id', 'ticker', 'action', 'quantity', 'price', 'break_even', 'win_probability', 'profit', 'liquidation_ticks', 'expires', 'Decision']].to_markdown(index=False), end='\n'*2)
+
+        scheduler = TickScheduler(session)
+        scheduler.on_tick(on_tick)
+        scheduler.on_data(get_securities, on_securities,
+                          key=lambda securities: [(s['bid'], s['ask'], s['bid_size'], s['ask_size'], s['position']) for s in securities])
+        scheduler.run(lambda case: case['tick'] >= 600 or shutdown)
 
 
 
@@ -0,0 +1,96 @@
+"""
+ETF Monitor Columns
+Whole-column versions of the per-row helpers the ETF scripts used to run through DataFrame.apply.
+
+The /securities JSON goes straight into one numpy array per field (one row per ticker, RITC and COMP
+first) and every derived column is a single array expression, so a pass costs microseconds and the scripts
+only build a DataFrame for printing.
+"""
+
+import time
+
+import numpy as np
+
+TICKERS = ['RITC', 'COMP']
+COLUMNS = ['position', 'last', 'bid_size', 'bid', 'ask', 'ask_size', 'volume']
+HALFLIFE = 2.0              # seconds for an imbalance observation to lose half its weight
+WINDOW = 16                 # observations back the slope is measured over
+DIRECTION_THRESHOLD = 0.82  # about the old ask/bid size ratio cut-offs of 0.09 and 10
+
+
+def securities_columns(securities, tickers):
+    """Columns for `tickers` (a list, extended in place with any ticker seen for the first time)."""
+    by_ticker = {s['ticker']: s for s in securities}
+    tickers.extend(t for t in by_ticker if t not in tickers)
+    return {column: np.array([by_ticker[t][column] if t in by_ticker else np.nan for t in tickers], dtype=float)
+            for column in COLUMNS}
+
+
+def spread_pct(bid, ask):
+    return (ask - bid) * 100 / ((ask + bid) / 2)
+
+
+def microprice(bid, ask, bid_size, ask_size):
+    """Touch prices weighted by the opposite size, so it leans toward the side about to be taken out."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
+
+
+def direction(imbalance, threshold=DIRECTION_THRESHOLD):
+    return np.where(imbalance > threshold, 'UP', np.where(imbalance < -threshold, 'Down', ''))
+
+
+class DepthFeatures:
+    """
+    Order-book imbalance features for every ticker at once, timestamped so they don't depend on the poll rate.
+
+    imbalance (bid_size - ask_size) / (bid_size + ask_size), from -1 (all offers) to 1 (all bids)
+    ew_imbalance time-decayed average: an observation dt seconds old weighs 2 ** (-dt / halflife)
+    slope change in imbalance per second over the last `window` observations, divided by the real time between them
+    microprice size-weighted touch
+
+    Observations go into fixed-size ring arrays (one row per ticker), so an update is a handful of array
+    operations whatever the history length.
+    """
+    def __init__(self, halflife=HALFLIFE, window=WINDOW):
+        self.halflife = halflife
+        self.window = window
+        self.times = np.full(window, np.nan)
+        self.imbalances = np.full((0, window), np.nan)
+        self.ew_imbalance = np.array([])
+        self.last = None
+        self.count = 0
+
+    def resize(self, n):
+        """Rows for tickers seen for the first time."""
+        extra = n - len(self.ew_imbalance)
+        if extra > 0:
+            self.imbalances = np.vstack([self.imbalances, np.full((extra, self.window), np.nan)])
+            self.ew_imbalance = np.concatenate([self.ew_imbalance, np.full(extra, np.nan)])
+
+    def update(self, cols, now=None):
+        """cols: securities_columns output. Returns {'imbalance', 'ew_imbalance', 'slope', 'microprice'} arrays."""
+        now = time.monotonic() if now is None else now
+        bid_size, ask_size = cols['bid_size'], cols['ask_size']
+        self.resize(len(bid_size))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            imbalance = (bid_size - ask_size) / (bid_size + ask_size)
+
+        # decay by the real time since the last update; new tickers start at their first observation
+        weight = 1.0 if self.last is None else 1 - 2 ** (-(now - self.last) / self.halflife)
+        ew = self.ew_imbalance
+        self.ew_imbalance = np.where(np.isnan(ew), imbalance, ew + weight * (np.nan_to_num(imbalance, nan=ew) - ew))
+
+        # oldest observation still in the ring is `window` updates back, written over by this one
+        slot = self.count % self.window
+        oldest = slot if self.count >= self.window else 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (imbalance - self.imbalances[:, oldest]) / (now - self.times[oldest])
+        slope = np.where(np.isfinite(slope), slope, 0.0)
+        self.times[slot] = now
+        self.imbalances[:, slot] = imbalance
+        self.last = now
+        self.count += 1
+
+        return {'imbalance': imbalance, 'ew_imbalance': self.ew_imbalance.copy(), 'slope': slope,
+                'microprice': microprice(cols['bid'], cols['ask'], bid_size, ask_size)}
@@ -0,0 +1,163 @@
+"""
+Competitive Tender Bids
+Profit-maximising price for tenders that are not fixed-bid, solved over a price grid in one array pass.
+
+A bid is measured by its premium: how much of the mid it gives to the client per share (positive = a
+higher price when we buy, a lower one when we sell). The client's chance of taking it is a logistic curve
+in the premium, fitted on past bids read from recorder captures. What we keep if it is taken is the
+book-walk break-even (TenderBook's liquidation cost) less the price. The solver multiplies the two over a
+grid of premiums for every open tender at once and picks the best cell in each row.
+
+The bid response only says the bid was received, so a capture's outcomes are read from what followed: a
+won tender moves our position by its quantity when it leaves the /tenders list, a lost one leaves it where
+it was. Until there are MIN_SAMPLES labelled bids with both wins and losses, the curve is the prior.
+
+    model = FillModel.from_captures(['heat1.ritlog', 'heat2.ritlog'])   # or FillModel() for the prior
+    price, probability, profit = model.solve(actions, break_even, mid, quantity)
+"""
+
+import bisect
+
+import numpy as np
+
+from recorder import Replay, ReplayMismatch
+
+# prior: ~20% at mid, ~90% when giving up 0.20 a share
+INTERCEPT = -1.4
+SLOPE = 17.0
+PREMIUMS = np.round(np.arange(-0.30, 0.3001, 0.01), 2)  # candidate premiums, one cent apart
+RIDGE = 1.0         # pull toward the prior, keeps small or cleanly separated samples from running off
+MIN_SAMPLES = 20    # labelled bids needed before the fit replaces the prior
+
+
+def premium(action, price, mid):
+    return price - mid if action == 'BUY' else mid - price
+
+
+class FillModel:
+    def __init__(self, intercept=INTERCEPT, slope=SLOPE, premiums=PREMIUMS):
+        self.intercept = intercept
+        self.slope = slope
+        self.premiums = premiums
+
+    def probability(self, premiums):
+        return 1 / (1 + np.exp(-np.clip(self.intercept + self.slope * np.asarray(premiums, dtype=float), -50, 50)))
+
+    @classmethod
+    def fit(cls, premiums, won, iterations=25, min_samples=MIN_SAMPLES):
+        """Logistic regression by Newton steps, shrunk toward the prior. The prior alone on too few or one-sided labels."""
+        x = np.asarray(premiums, dtype=float)
+        y = np.asarray(won, dtype=float)
+        if len(x) < min_samples or y.min() == y.max():
+            return cls()
+        X = np.column_stack([np.ones(len(x)), x])
+        prior = np.array([INTERCEPT, SLOPE])
+        w = prior.copy()
+        for _ in range(iterations):
+            p = 1 / (1 + np.exp(-np.clip(X @ w, -50, 50)))
+            gradient = X.T @ (y - p) - RIDGE * (w - prior)
+            hessian = (X * (p * (1 - p))[:, None]).T @ X + RIDGE * np.eye(2)
+            step = np.linalg.solve(hessian, gradient)
+            w = w + step
+            if np.abs(step).max() < 1e-8:
+                break
+        return cls(w[0], w[1])
+
+    @classmethod
+    def from_captures(cls, paths):
+        premiums, won = [], []
+        for path in paths:
+            for p, outcome in capture_outcomes(path):
+                premiums.append(p)
+                won.append(outcome)
+        return cls.fit(premiums, won)
+
+    def solve(self, actions, break_even, mid, quantity):
+        """
+        Best bid for each tender. actions, break_even, mid and quantity are arrays with one entry per tender.
+        Returns (price, win probability, expected profit) arrays; nan where the tender can't be priced.
+        """
+        sign = np.where(np.asarray(actions) == 'BUY', 1.0, -1.0)
+        # per-share profit if taken at mid, then less whatever premium we hand over
+        base = sign * (np.asarray(break_even, dtype=float) - np.asarray(mid, dtype=float))
+        expected = self.probability(self.premiums)[None, :] * (base[:, None] - self.premiums[None, :])
+        expected = expected * np.asarray(quantity, dtype=float)[:, None]
+        priced = ~np.isnan(expected).all(axis=1)
+        best = np.argmax(np.where(np.isnan(expected), -np.inf, expected), axis=1)
+        chosen = self.premiums[best]
+        price = np.where(priced, np.round(mid + sign * chosen, 2), np.nan)
+        probability = np.where(priced, self.probability(chosen), np.nan)
+        return price, probability, np.where(priced, expected[np.arange(len(best)), best], np.nan)
+
+
+def capture_outcomes(path):
+    """
+    (premium, won) for every competitive tender bid in a recorder capture that was resolved before it ended.
+    The premium is priced against the mid when the last bid on the tender was sent. won is whether our position
+    moved by the tender quantity across its close: from the later of the bid and the last poll that still listed
+    it, to the first poll it was gone from, after taking out the fills of our own orders sent in between.
+    """
+    replay = Replay(path, realtime=False)
+    try:
+        tenders = replay.find_stream('GET', 'tenders', {})
+        securities = replay.find_stream('GET', 'securities', {})
+    except ReplayMismatch:
+        return
+    if tenders is None or securities is None:
+        return
+
+    # every tender seen, the last poll that listed it and the first poll it was missing from after that
+    seen, listed_at, gone = {}, {}, {}
+    for t, (status, body) in zip(replay.times[tenders], replay.bodies[tenders]):
+        if status != 200 or not isinstance(body, list):
+            continue
+        listed = {tender['tender_id'] for tender in body}
+        for tender in body:
+            seen.setdefault(tender['tender_id'], tender)
+            listed_at[tender['tender_id']] = t
+            gone.pop(tender['tender_id'], None)
+        for tender_id in seen.keys() - listed:
+            gone.setdefault(tender_id, t)
+
+    # the last accepted bid on each tender
+    bids = {}
+    for (method, endpoint, params), stream in replay.streams.items():
+        params = dict(params)
+        if method != 'POST' or not endpoint.startswith('tenders/') or 'price' not in params:
+            continue
+        tender_id = int(endpoint.split('/')[1])
+        for t, (status, body) in zip(replay.times[stream], replay.bodies[stream]):
+            if status == 200 and (tender_id not in bids or t > bids[tender_id][0]):
+                bids[tender_id] = (t, float(params['price']))
+
+    # our own order fills by time, so trading around the close isn't mistaken for the tender
+    fills = []
+    for (method, endpoint, params), stream in replay.streams.items():
+        if method != 'POST' or endpoint != 'orders':
+            continue
+        for t, (status, body) in zip(replay.times[stream], replay.bodies[stream]):
+            if status == 200 and isinstance(body, dict) and body.get('quantity_filled'):
+                signed = body['quantity_filled'] if body['action'] == 'BUY' else -body['quantity_filled']
+                fills.append((t, body['ticker'], signed))
+
+    def snapshot(i, ticker):
+        return {s['ticker']: s for s in replay.bodies[securities][i][1]}.get(ticker)
+
+    for tender_id, (t, price) in bids.items():
+        tender = seen.get(tender_id)
+        if tender is None or tender_id not in gone or gone[tender_id] < t:
+            continue
+        sent = bisect.bisect_right(replay.times[securities], t) - 1
+        before = bisect.bisect_right(replay.times[securities], max(t, listed_at[tender_id])) - 1
+        after = bisect.bisect_left(replay.times[securities], gone[tender_id])
+        if sent < 0 or after >= len(replay.times[securities]):
+            continue
+        book, opened, closed = (snapshot(i, tender['ticker']) for i in (sent, before, after))
+        if not book or not opened or not closed or not book['bid'] or not book['ask']:
+            continue
+        start, end = replay.times[securities][before], replay.times[securities][after]
+        own = sum(signed for ft, ticker, signed in fills if ticker == tender['ticker'] and start < ft <= end)
+        jump = closed['position'] - opened['position'] - own
+        quantity = tender['quantity'] if tender['action'] == 'BUY' else -tender['quantity']
+        mid = (book['bid'] + book['ask']) / 2
+        yield premium(tender['action'], price, mid), abs(jump - quantity) < abs(jump)
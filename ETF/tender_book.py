@@ -0,0 +1,136 @@
+"""
+ETF Tender Book
+Every open tender by tender_id, scored together each poll and ranked into an accept list that fits the limits.
+
+The /tenders list can hold several tenders at once, even on the same ticker. Each poll the book drops the ones
+that expired or left the list. It then walks each ticker's order book once for all of that ticker's tender
+quantities (one liquidation_cost call per ticker and side). Every tender gets a break-even, a per-share edge,
+an expected profit, the ticks it takes to unwind into the visible depth, and its share of the gross and net
+limits. Competitive tenders are priced by the bid solver (tender_bid.FillModel), and their profit is
+weighted by the chance the bid wins. Tenders go into the accept list best profit first. Each one is checked
+against a copy of the risk gate that already holds the tenders taken before it, so accepting the whole list
+together stays within the limits.
+
+    book = TenderBook(fee=0.02, margin=0.05)
+    book.update(get_tenders(session), tick)
+    scores = book.score(session, gate, tick)       # dict of column arrays, one entry per tender, ranked
+    scores['accept']                               # True for the tenders to take
+    make_decision(scores)                          # 'Take' / 'Decline' / 'Bid <price>' per tender
+"""
+
+import numpy as np
+
+from book import book_side, get_book, liquidation_cost
+from tender_bid import FillModel
+
+FEE = 0.02          # per share on the market orders that unwind the tender
+MARGIN = 0.05       # per-share edge a tender has to clear
+CASE_TICKS = 600
+
+
+class TenderBook:
+    def __init__(self, fee=FEE, margin=MARGIN, case_ticks=CASE_TICKS, fill_model=None):
+        self.fee = fee
+        self.margin = margin
+        self.case_ticks = case_ticks
+        self.fill_model = fill_model or FillModel()
+        self.tenders = {}
+
+    def update(self, tenders, tick):
+        """Replace the book with the polled tenders, leaving out any already past expiry."""
+        self.tenders = {t['tender_id']: t for t in tenders if t.get('expires') is None or t['expires'] > tick}
+        return self.tenders
+
+    def score(self, session, gate=None, tick=0):
+        """
+        Score every open tender and rank them. Returns a dict of column arrays sorted best first:
+        tender_id, ticker, action, fixed, quantity, price (the solved bid for competitive tenders), expires,
+        break_even, edge (per share), win_probability, profit (expected), liquidation_ticks,
+        gross_use / net_use (largest fraction of any limit the tender takes), accept.
+        """
+        tenders = sorted(self.tenders.values(), key=lambda t: t['tender_id'])
+        n = len(tenders)
+        cols = {
+            'tender_id': np.array([t['tender_id'] for t in tenders], dtype=int),
+            'ticker': np.array([t['ticker'] for t in tenders], dtype=object),
+            'action': np.array([t['action'] for t in tenders], dtype=object),
+            'fixed': np.array([t['is_fixed_bid'] for t in tenders], dtype=bool),
+            'quantity': np.array([t['quantity'] for t in tenders], dtype=float),
+            'price': np.array([np.nan if t['price'] is None else t['price'] for t in tenders], dtype=float),
+            'expires': np.array([t.get('expires') or self.case_ticks for t in tenders], dtype=int),
+            'break_even': np.full(n, np.nan),
+            'mid': np.full(n, np.nan),
+            'liquidation_ticks': np.full(n, np.inf),
+        }
+
+        # one book read per ticker, one vectorized walk per ticker and side
+        for ticker in set(cols['ticker']):
+            book = get_book(session, ticker)
+            for action in ('BUY', 'SELL'):
+                rows = np.flatnonzero((cols['ticker'] == ticker) & (cols['action'] == action))
+                if not len(rows):
+                    continue
+                cost = liquidation_cost(book, action, cols['quantity'][rows], self.fee)
+                cols['break_even'][rows] = cost['break_even']
+                if book['bids'] and book['asks']:
+                    cols['mid'][rows] = (book['bids'][0]['price'] + book['asks'][0]['price']) / 2
+                # the visible depth is what one tick of market orders can take before the book refills
+                depth = book_side(book, 'SELL' if action == 'BUY' else 'BUY')[1].sum()
+                if depth > 0:
+                    cols['liquidation_ticks'][rows] = np.ceil(cols['quantity'][rows] / depth)
+
+        # competitive tenders: best bid over the price grid, all of them in one pass
+        cols['win_probability'] = np.where(cols['fixed'], 1.0, np.nan)
+        open_bid = np.flatnonzero(~cols['fixed'])
+        if len(open_bid):
+            price, probability, _ = self.fill_model.solve(cols['action'][open_bid], cols['break_even'][open_bid],
+                                                          cols['mid'][open_bid], cols['quantity'][open_bid])
+            cols['price'][open_bid] = price
+            cols['win_probability'][open_bid] = probability
+
+        sign = np.where(cols['action'] == 'BUY', 1.0, -1.0)
+        cols['edge'] = sign * (cols['break_even'] - cols['price'])
+        cols['profit'] = cols['win_probability'] * cols['edge'] * cols['quantity']
+        cols['gross_use'], cols['net_use'] = self.limit_use(gate, cols)
+
+        # best profit first, sooner expiry breaks ties; tenders that can't be priced go last
+        order = np.lexsort((cols['expires'], -np.nan_to_num(cols['profit'], nan=-np.inf)))
+        cols = {name: column[order] for name, column in cols.items()}
+        cols['accept'] = self.accept(gate, cols, tick)
+        return cols
+
+    @staticmethod
+    def limit_use(gate, cols):
+        gross = np.zeros(len(cols['quantity']))
+        net = np.zeros(len(cols['quantity']))
+        if gate is None:
+            return gross, net
+        for i, ticker in enumerate(cols['ticker']):
+            for name, units in gate.units.get(ticker, ()):
+                gross_limit, net_limit = gate.limits[name]
+                gross[i] = max(gross[i], units * cols['quantity'][i] / gross_limit)
+                net[i] = max(net[i], units * cols['quantity'][i] / net_limit)
+        return gross, net
+
+    def accept(self, gate, cols, tick):
+        """Tenders worth taking (or bidding on), in rank order, each only if it still fits next to the ones before it."""
+        worth = ((cols['edge'] > self.margin)
+                 & (tick + cols['liquidation_ticks'] <= self.case_ticks))
+        accept = np.zeros(len(worth), dtype=bool)
+        scratch = gate.copy() if gate is not None else None
+        for i in np.flatnonzero(worth):
+            ticker, action, quantity = cols['ticker'][i], cols['action'][i], int(cols['quantity'][i])
+            if scratch is not None:
+                if scratch.allowed(ticker, action, quantity) < quantity:
+                    continue
+                scratch.apply(ticker, position=quantity if action == 'BUY' else -quantity)
+            accept[i] = True
+        return accept
+
+
+# Take / Decline from the ranked accept list, the solved bid for competitive tenders worth bidding on
+def make_decision(scores):
+    decision = np.where(scores['accept'], 'Take', 'Decline').astype(object)
+    for i in np.flatnonzero(scores['accept'] & ~scores['fixed']):
+        decision[i] = f"Bid {scores['price'][i]:.2f}"
+    return decision
@@ -1,18 +1,36 @@
+import asyncio
+import os
+import sys
 import signal
-import requests
 from time import sleep
 import threading
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from arbitrage import BasketArbitrage, format_signal
+from book import get_book, tender_edge
+from connection import SessionPool
+from execution import UnwindEngine, format_report
+from gateway import QUOTE, RISK, order_gateway
+from instrument import InstrumentedSession
+from market_data import MarketFeed, QuoteCache
+from mirror import OrderMirror
+from quoting import QuoteBook
+from risk import RiskGate
+
 TICKERS = ["HAWK", "DOVE", "RIT_C", "RIT_U"]
+BASKET = {"HAWK": 1, "DOVE": 1}     # one of each stock per ETF share
+RIT_C_CONVERTER = 0.0               # ETF creation / redemption cost per share, free for RIT_C
+RIT_U_CONVERTER = 1500 / 10000      # USD 1,500 per 10,000 RIT_U converted
 POSITION_SIZE = 10000
 POSITION_LIMITS = {"gross": 0, "net": 0}
-SPEEDBUMP = 0.5
+SPEEDBUMP = 0.5  # poll interval for the case and tenders, order pacing is the gateway's job
 API_KEY = {'X-API-Key': 'GITHUB'}
 shutdown = False
-session = requests.Session()
-session.headers.update(API_KEY)
 exit_event = threading.Event()
 tick = 0
+mirror = None
+market = None
+unwinds = {}  # ticker -> [signed quantity still to trade, break-even limit for the first pass or None]
 
 
 class ApiException(Exception):
@@ -43,63 +61,27 @@ def update_tick(session):
     if resp.ok:
         case = resp.json()
         tick = case['tick']
+        return tick
     else:
         raise ApiException("Cannot connect to server")
 
 
-def get_asset_info(session, ticker):
-    resp = session.get(f'http://localhost:9999/v1/securities?ticker={ticker}')
-
-    if resp.ok:
-        order = resp.json()[0]
-        return order["bid"], order["ask"], order["position"]
-
-
 # ---------- TRADE EXECUTION ------------ #
-def market_order(session, security_name, quantity, action):
-    orders = int(abs(quantity) // POSITION_SIZE)
-    remainder = int(abs(quantity % POSITION_SIZE))
-
-    for o in range(orders):
-        session.post('http://localhost:9999/v1/orders', params={'ticker': security_name, 'type': 'MARKET',
-                                                                'quantity': POSITION_SIZE, 'action': action})
-
-    session.post('http://localhost:9999/v1/orders', params={'ticker': security_name, 'type': 'MARKET',
-                                                            'quantity': remainder, 'action': action})
-
-
-def limit_order(session, security_name, price, quantity, action):
-    orders = int(abs(quantity) // POSITION_SIZE)
-    remainder = int(abs(quantity % POSITION_SIZE))
-
-    for o in range(orders):
-        session.post('http://localhost:9999/v1/orders',
-                     params={'ticker': security_name, 'type': 'LIMIT', 'price': price,
-                             'quantity': POSITION_SIZE, 'action': action})
-
-    session.post('http://localhost:9999/v1/orders', params={'ticker': security_name, 'type': 'LIMIT', 'price': price,
-                                                            'quantity': remainder, 'action': action})
-
-
-def delete_all_orders(session, ticker):
-    resp = session.get(f'http://localhost:9999/v1/orders?status=OPEN&ticker={ticker}')
-    if resp.ok:
-        orders = resp.json()
-        for order in orders:
-            id = order["order_id"]
-            session.delete('http://localhost:9999/v1/orders/{}'.format(id))
+def market_order(session, security_name, quantity, action, priority=RISK, slice_size=None):
+    return order_gateway(session, slice_size=POSITION_SIZE).submit(security_name, quantity, action, 'MARKET',
+                                                                   slice_size=slice_size, priority=priority)
 
 
-def offload_inventory(session, ticker):
-    bid, ask, volume = get_asset_info(session, ticker)
-    action = "BUY" if volume < 0 else "SELL"
-    market_order(session, ticker, volume, action)
+def limit_order(session, security_name, price, quantity, action, priority=QUOTE):
+    return order_gateway(session, slice_size=POSITION_SIZE).submit(security_name, quantity, action, 'LIMIT', price,
+                                                                   priority=priority)
 
 
 # ------- TENDER OFFER -------- #
-OFFER_THRESHOLD = 0.18 #TODO: INCREASE IF VOLATILE
-SPLIT = 20
-SLEEP_AMOUNT = 0.5 #TODO: make this dynamic based on order size and price
+FEE = 0.02  # per share on market orders
+OFFER_THRESHOLD = 0.05 # edge per share over the book-walk break-even #TODO: INCREASE IF VOLATILE
+UNWIND_TOLERANCE = 0.05
+UNWIND_MAX_COST = 0.25  # per pass, from the touch the pass starts at
 
 def get_tender_offers(session):
     while not exit_event.is_set():
@@ -109,6 +91,7 @@ def get_tender_offers(session):
             if len(tenders) > 0:
                 curr_tender = tenders[-1]
                 process_offer(session, curr_tender)
+        work_unwinds(session)
 
         sleep(SPEEDBUMP)
 
@@ -117,26 +100,61 @@ def process_offer(session, tender_offer):
     quantity = tender_offer["quantity"]
     ticker = tender_offer["ticker"]
     id = tender_offer["tender_id"]
-    bid, ask, _ = get_asset_info(session, ticker)
+    # break-even from walking the book for the whole quantity after market-order fees, our own quotes left out
+    edge, cost = tender_edge(get_book(session, ticker), tender_offer["action"], quantity, price, FEE,
+                             exclude={o['order_id'] for o in mirror.orders(ticker)})
+    if not edge > OFFER_THRESHOLD:
+        return
+
+    # only a tender the server actually gave us moves the position (it may have expired or been taken)
+    resp = session.post(f'http://localhost:9999/v1/tenders/{id}')
+    if not resp.ok or not resp.json().get('success'):
+        print(f"Tender {id} not accepted:", resp.status_code, resp.text)
+        return
 
     # Client wants to buy from us
-    if tender_offer["action"] == "SELL" and price > ask + OFFER_THRESHOLD:
-        print(f"Accepted {quantity} buy offer with ask:", ask, "tender:", tender_offer)
-        session.post(f'http://localhost:9999/v1/tenders/{id}')
-        unroll_offer(session, quantity, ticker, "BUY")
-
-    elif tender_offer["action"] == "BUY" and price < bid - OFFER_THRESHOLD:
-        print(f"Accepted {quantity} sell offer with bid:", bid, "tender:", tender_offer)
-        session.post(f'http://localhost:9999/v1/tenders/{id}')
-        unroll_offer(session, quantity, ticker, "SELL")
-
-def unroll_offer(session, quantity, ticker, action):
-    round_quantity = quantity // SPLIT
+    if tender_offer["action"] == "SELL":
+        print(f"Accepted {quantity} buy offer with break-even:", cost['break_even'][0], "tender:", tender_offer)
+        mirror.on_fill(ticker, "SELL", quantity)
+        unroll_offer(session, quantity, ticker, "BUY", price - FEE)
+
+    elif tender_offer["action"] == "BUY":
+        print(f"Accepted {quantity} sell offer with break-even:", cost['break_even'][0], "tender:", tender_offer)
+        mirror.on_fill(ticker, "BUY", quantity)
+        unroll_offer(session, quantity, ticker, "SELL", price + FEE)
+
+# limit: worst price the tender still breaks even at, after the fee on the unwind
+def unroll_offer(session, quantity, ticker, action, limit=None):
     print("Unrolling tender offer")
-
-    for i in range(SPLIT):
-        market_order(session, ticker, round_quantity, action)
-        sleep(SLEEP_AMOUNT)
+    signed = quantity if action == "BUY" else -quantity
+    if ticker in unwinds:
+        # netted against an unwind already queued, the old break-even no longer applies
+        unwinds[ticker] = [unwinds[ticker][0] + signed, None]
+    else:
+        unwinds[ticker] = [signed, limit]
+    work_unwinds(session)
+
+# every queued unwind gets a pass; whatever a pass leaves (cost cap, limit, timeout) stays queued until flat
+def work_unwinds(session):
+    # child orders sized by the book within UNWIND_TOLERANCE, stopping if the price runs UNWIND_MAX_COST away
+    engine = UnwindEngine(session, order_gateway(session), UNWIND_TOLERANCE, UNWIND_MAX_COST, max_child=POSITION_SIZE,
+                          exclude=lambda: [o['order_id'] for o in mirror.orders()])
+    for ticker, (signed, limit) in list(unwinds.items()):
+        if exit_event.is_set():
+            return
+        if signed == 0:
+            del unwinds[ticker]
+            continue
+        report = engine.unwind(ticker, abs(signed), "BUY" if signed > 0 else "SELL", stop=exit_event.is_set,
+                               limit=limit)
+        print(format_report(report))
+        done = report['quantity'] - report['remaining']
+        remaining = signed - done if signed > 0 else signed + done
+        if remaining:
+            # later passes go by the cost cap from their own touch so the position always gets worked down
+            unwinds[ticker] = [remaining, None]
+        else:
+            del unwinds[ticker]
 
 
 # ---------- MARKET MAKER ------------ #
@@ -146,52 +164,115 @@ INVENTORY_MULTIPLIER = 0.008
 NUM_POSITIONS = 4
 POS_MULT = 0.5
 
-def make_market(session, tickers):
-    print("making market")
+# bid / ask targets for one ticker, None for a side we don't quote, or None overall to pull every quote
+def quote_targets(ticker, bid, ask, position):
+    inventory_multiplier = (position / POSITION_LIMITS["gross"]) * INVENTORY_MULTIPLIER
+    price_t = (bid + ask) / 2 #TODO: fix later?
+    price_t = price_t * (1 - inventory_multiplier)
+    spread = ask - bid
+    set_spread = spread * SPREAD_MULTIPLIER / 2
+    print(f"{ticker} Initial BID, ASK:", bid, ask)
+
+    if spread > MIN_SPREAD[ticker]:
+        bid = price_t - set_spread
+        ask = price_t + set_spread
+        bid_quantity = POSITION_SIZE*NUM_POSITIONS if position < 0 else max(0, POSITION_SIZE*NUM_POSITIONS - POS_MULT*position)
+        ask_quantity = POSITION_SIZE*NUM_POSITIONS if position > 0 else max(0, POSITION_SIZE*NUM_POSITIONS - POS_MULT*position)
+        print(f"{ticker} Target orders: BID {bid_quantity}: {bid}, ASK {ask_quantity}: {ask}")
+        return (bid, bid_quantity), (ask, ask_quantity)
+    elif position < 0:
+        return (bid+0.01, position), None
+    elif position > 0:
+        return None, (ask-0.01, position)
+    return None
+
+
+# one coroutine per ticker, each requotes as soon as a newer snapshot than the one it last used arrives
+async def quote_ticker(quotes, ticker, feed):
+    stamp = None
+    delay = order_gateway(quotes.session).execution_delay(ticker)
     while not exit_event.is_set():
-        for ticker in tickers:
-            bid, ask, position = get_asset_info(session, ticker)
-            inventory_multiplier = (position / POSITION_LIMITS["gross"]) * INVENTORY_MULTIPLIER
-            price_t = (bid + ask) / 2 #TODO: fix later?
-            price_t = price_t * (1 - inventory_multiplier)
-            spread = ask - bid
-            set_spread = spread * SPREAD_MULTIPLIER / 2
-            print(f"{ticker} Initial BID, ASK:", bid, ask)
-
-            delete_all_orders(session, ticker)
-
-            if spread > MIN_SPREAD[ticker]:
-                bid = price_t - set_spread
-                ask = price_t + set_spread
-                bid_quantity = POSITION_SIZE*NUM_POSITIONS if position < 0 else max(0, POSITION_SIZE*NUM_POSITIONS - POS_MULT*position)
-                ask_quantity = POSITION_SIZE*NUM_POSITIONS if position > 0 else max(0, POSITION_SIZE*NUM_POSITIONS - POS_MULT*position)
-                print(f"{ticker} New orders: submitted BID {bid_quantity}: {bid}, ASK {ask_quantity}: {ask}")
-                limit_order(session, ticker, bid, bid_quantity, "BUY")
-                limit_order(session, ticker, ask, ask_quantity, "SELL")
-            elif position < 0:
-                limit_order(session, ticker, bid+0.01, position, "BUY")
-            elif position > 0:
-                limit_order(session, ticker, ask-0.01, position, "SELL")
-
-        sleep(SPEEDBUMP)
+        stamp, book = await feed.next(stamp)
+        if book is None:
+            return
+        position = mirror.position(ticker)
+        targets = quote_targets(ticker, book[ticker].bid, book[ticker].ask, position)
+
+        # only levels that changed are cancelled and replaced, off the event loop so the other books keep going
+        if targets is None:
+            await asyncio.to_thread(quotes.clear, ticker)
+        else:
+            await asyncio.to_thread(quotes.update, ticker, position, *targets)
+
+        # next cycle once our requotes are acked and have had time to reach the book
+        # a failed requote is picked up as stale on the next cycle, it must not stop this ticker's loop
+        await asyncio.gather(*(asyncio.wrap_future(order) for order in quotes.take_placed()), return_exceptions=True)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+# RIT_C (CAD) and RIT_U (USD) against their HAWK + DOVE basket on the same snapshots, logged to measure whether
+# the arbitrage ever pays after fees and the converter
+async def watch_arbitrage(feed, arbitrages):
+    stamp = None
+    while not exit_event.is_set():
+        stamp, book = await feed.next(stamp)
+        if book is None:
+            return
+        securities = {ticker: quote._asdict() for ticker, quote in book.items()}
+        for arbitrage in arbitrages:
+            found = arbitrage.update(securities)
+            if found:
+                print(format_signal(found))
+
+
+async def market_maker(sessions, tickers):
+    feed = MarketFeed(market)
+    books = [QuoteBook(sessions.new(), limit_order, mirror) for ticker in tickers]
+    arbitrages = [BasketArbitrage('RIT_C', BASKET, converter_cost=RIT_C_CONVERTER),
+                  BasketArbitrage('RIT_U', BASKET, fx='USD', converter_cost=RIT_U_CONVERTER)]
+    await asyncio.gather(feed.run(exit_event), watch_arbitrage(feed, arbitrages),
+                         *(quote_ticker(quotes, ticker, feed) for quotes, ticker in zip(books, tickers)))
+
+
+# sessions: SessionPool, every ticker gets its own connection for its cancels
+def make_market(sessions, tickers):
+    print("making market")
+    asyncio.run(market_maker(sessions, tickers))
 
 
 # ---------- RUN ALGO ------------ #
 def main():
     global exit_event
     global tick
+    global mirror
+    global market
 
-    with requests.Session() as session:
-        session.headers.update(API_KEY)
+    # every thread gets its own keep-alive session, the quote cache and mirror included
+    with SessionPool(API_KEY, InstrumentedSession) as sessions:
+        session = sessions.session()
         get_position_limits(session)
         update_tick(session)
 
+        # USD only feeds the RIT_U / RIT_C arbitrage monitor, it isn't quoted
+        market = QuoteCache(sessions.new(), TICKERS + ["USD"])
+
+        # every order is clipped to the gross / net limits, resting quotes included
+        risk = RiskGate.from_session(session)
+        gateway = order_gateway(session, slice_size=POSITION_SIZE)
+        gateway.set_risk(risk)
+
+        # positions and open orders, kept locally from our acks and reconciled in the background
+        mirror = OrderMirror(sessions.new(), risk=risk)
+        gateway.add_listener(mirror.on_ack)
+        mirror.start(exit_event)
+
         # MARKET MAKING STRAT
-        thread_mm = threading.Thread(target=make_market, args=(session, TICKERS))
+        thread_mm = threading.Thread(target=make_market, args=(sessions, TICKERS), name='market_maker')
         thread_mm.start()
 
         # TENDER OFFER STRAT
-        thread_get_offers = threading.Thread(target=get_tender_offers, args=(session,))
+        thread_get_offers = threading.Thread(target=get_tender_offers, args=(sessions.new(),), name='tenders')
         thread_get_offers.start()
 
         while update_tick(session) < 295 and not shutdown:
@@ -201,6 +282,7 @@ def main():
         thread_mm.join()
         thread_get_offers.join()
 
+        print(session.stats.summary())
 
 if __name__ == '__main__':
     signal.signal(signal.SIGINT, signal_handler)
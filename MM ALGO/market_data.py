@@ -0,0 +1,76 @@
+"""
+Batched quote cache for the market maker.
+
+One GET /v1/securities returns every book, so the cache refreshes all tickers together and hands out compact
+per-ticker records stamped with the time of the fetch. Threads asking within max_age of the last refresh reuse
+it; a thread that finds it stale refreshes for everyone while the others wait on the same fetch.
+
+MarketFeed publishes the cache to asyncio code: one task refreshes it and every waiting coroutine wakes on the
+same snapshot.
+"""
+
+import asyncio
+import threading
+import time
+from collections import namedtuple
+
+from api import fetch
+
+MAX_AGE = 0.1
+
+Quote = namedtuple('Quote', ['bid', 'ask', 'bid_size', 'ask_size', 'last', 'position', 'time'])
+
+
+class QuoteCache:
+    def __init__(self, session, tickers, max_age=MAX_AGE):
+        self.session = session
+        self.tickers = set(tickers)
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.quotes = {}
+        self.updated = None
+
+    def refresh(self):
+        securities = fetch(self.session, 'securities')
+        now = time.monotonic()
+        self.quotes = {s['ticker']: Quote(s['bid'], s['ask'], s.get('bid_size', 0), s.get('ask_size', 0), s['last'],
+                                          s['position'], now)
+                       for s in securities if s['ticker'] in self.tickers}
+        self.updated = now
+
+    def age(self):
+        return float('inf') if self.updated is None else time.monotonic() - self.updated
+
+    # every ticker from the same fetch, no older than max_age
+    def snapshot(self, max_age=None):
+        with self.lock:
+            if self.age() > (self.max_age if max_age is None else max_age):
+                self.refresh()
+            return self.quotes
+
+
+class MarketFeed:
+    def __init__(self, cache):
+        self.cache = cache
+        self.stamp = None
+        self.quotes = None
+        self.closed = False
+        self.changed = asyncio.Condition()
+
+    async def run(self, exit_event):
+        while not exit_event.is_set():
+            quotes = await asyncio.to_thread(self.cache.snapshot)
+            async with self.changed:
+                if self.cache.updated != self.stamp:
+                    self.stamp, self.quotes = self.cache.updated, quotes
+                    self.changed.notify_all()
+            await asyncio.sleep(max(self.cache.max_age - self.cache.age(), 0))
+        async with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+
+    async def next(self, stamp=None):
+        """Wait for a snapshot newer than `stamp`. Returns (stamp, quotes), quotes None once the feed stops."""
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.closed or (self.quotes is not None and self.stamp != stamp))
+            return (None, None) if self.closed else (self.stamp, self.quotes)
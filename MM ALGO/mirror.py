@@ -0,0 +1,93 @@
+"""
+Local mirror of our open orders and positions.
+
+Updated in-process from our own order acks, cancels and accepted tenders, and reconciled against
+/v1/securities and /v1/orders?status=OPEN by a background thread at a low rate. Strategy threads read
+positions and resting orders from here with no network round-trip; anything the local updates miss
+(passive fills of resting orders) is picked up by the next reconcile. An optional RiskGate is kept in step with
+the same cancels, tender fills and reconciles.
+"""
+
+import threading
+import time
+
+from api import API_URL
+
+RECONCILE_INTERVAL = 1.0
+
+
+class OrderMirror:
+    def __init__(self, session, interval=RECONCILE_INTERVAL, risk=None):
+        self.session = session
+        self.interval = interval
+        self.risk = risk
+        self.lock = threading.Lock()
+        self.positions = {}
+        self.open_orders = {}
+        self.reconciled_at = None
+        self.thread = None
+
+    # ----- reads, no network -----
+    def position(self, ticker):
+        with self.lock:
+            return self.positions.get(ticker, 0)
+
+    def orders(self, ticker=None):
+        with self.lock:
+            return [dict(o) for o in self.open_orders.values() if ticker is None or o['ticker'] == ticker]
+
+    # ----- local updates -----
+    def on_ack(self, ack):
+        with self.lock:
+            filled = ack.get('quantity_filled') or 0
+            if filled:
+                signed = filled if ack['action'] == 'BUY' else -filled
+                self.positions[ack['ticker']] = self.positions.get(ack['ticker'], 0) + signed
+            if ack.get('status') == 'OPEN':
+                self.open_orders[ack['order_id']] = dict(ack)
+
+    def on_cancel(self, order_ids):
+        with self.lock:
+            for order_id in order_ids:
+                self.open_orders.pop(order_id, None)
+        if self.risk is not None:
+            self.risk.on_cancel(order_ids)
+
+    def on_fill(self, ticker, action, quantity):
+        with self.lock:
+            signed = quantity if action == 'BUY' else -quantity
+            self.positions[ticker] = self.positions.get(ticker, 0) + signed
+        if self.risk is not None:
+            self.risk.on_fill(ticker, action, quantity)
+
+    # true once a reconcile that started after `since` (time.monotonic) has confirmed the order is gone
+    def known_closed(self, order_id, since):
+        with self.lock:
+            return self.reconciled_at is not None and self.reconciled_at > since and order_id not in self.open_orders
+
+    # ----- reconcile -----
+    def reconcile(self):
+        started = time.monotonic()
+        since = self.risk.marker() if self.risk is not None else None
+        securities = self.session.get(f'{API_URL}/securities')
+        orders = self.session.get(f'{API_URL}/orders', params={'status': 'OPEN'})
+        if not (securities.ok and orders.ok):
+            return False
+        with self.lock:
+            self.positions = {s['ticker']: s['position'] for s in securities.json()}
+            self.open_orders = {o['order_id']: o for o in orders.json()}
+            self.reconciled_at = started
+        if self.risk is not None:
+            self.risk.sync(self.positions, orders.json(), since)
+        return True
+
+    def run(self, exit_event):
+        while not exit_event.is_set():
+            self.reconcile()
+            exit_event.wait(self.interval)
+
+    def start(self, exit_event):
+        self.reconcile()
+        self.thread = threading.Thread(target=self.run, args=(exit_event,), name='order_mirror', daemon=True)
+        self.thread.start()
+        return self.thread
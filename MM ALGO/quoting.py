@@ -0,0 +1,92 @@
+"""
+Quote book for the market maker.
+
+Keeps our live bid / ask per ticker locally and only touches the server when a target quote differs from the
+resting one. Unchanged levels keep their queue priority and cost no API calls.
+"""
+
+import time
+
+from api import API_URL
+from gateway import QUOTE, RISK
+
+SIDES = {'bid': 'BUY', 'ask': 'SELL'}
+
+
+class QuoteBook:
+    """
+    session: API session used for cancels
+    place: function(session, ticker, price, quantity, action, priority) -> Future of the gateway parent order
+    mirror: optional OrderMirror, kept in step with our cancels and used to spot quotes that have traded
+    """
+    def __init__(self, session, place, mirror=None):
+        self.session = session
+        self.place = place
+        self.mirror = mirror
+        self.live = {}
+        self.positions = {}
+        self.placed = []
+
+    def update(self, ticker, position, bid=None, ask=None):
+        """
+        bid / ask: (price, quantity) targets, None to have no quote on that side.
+        A change in position since the last update means one of our quotes traded, so that side is refreshed
+        even if the target is unchanged. The side that reduces the position is sent at RISK priority.
+        """
+        live = self.live.setdefault(ticker, {})
+        prev_position = self.positions.get(ticker, position)
+        self.positions[ticker] = position
+        stale = {'bid': position > prev_position, 'ask': position < prev_position}
+        priority = {'bid': RISK if position < 0 else QUOTE, 'ask': RISK if position > 0 else QUOTE}
+        for side, target in (('bid', bid), ('ask', ask)):
+            self.set_side(ticker, live, side, target, stale[side], priority[side])
+
+    def set_side(self, ticker, live, side, target, stale, priority=QUOTE):
+        if target is not None:
+            price, quantity = round(target[0], 2), int(abs(target[1]))
+            target = (price, quantity) if quantity > 0 else None
+        current = live.get(side)
+        # the risk gate clipped it (or it failed) last time, try again now that the limits may allow more
+        if current is not None and current['order'].done() and (current['order'].exception() is not None
+                                                                or current['order'].result().get('clipped')):
+            stale = True
+        if current is not None and self.mirror is not None and 'acked' in current:
+            stale = stale or any(self.mirror.known_closed(i, current['acked']) for i in self.order_ids(current))
+        if current is not None and current['quote'] == target and not stale:
+            return
+        if current is None and target is None:
+            return
+
+        if current is not None:
+            self.cancel_ids(self.order_ids(current))
+            del live[side]
+        if target is not None:
+            quote = {'quote': target, 'order': self.place(self.session, ticker, target[0], target[1], SIDES[side], priority)}
+            # fills are only trusted from reconciles that started after every slice was acked
+            quote['order'].add_done_callback(lambda order, quote=quote: quote.__setitem__('acked', time.monotonic()))
+            live[side] = quote
+            self.placed.append(quote['order'])
+
+    # futures of every order placed since the last call
+    def take_placed(self):
+        placed, self.placed = self.placed, []
+        return placed
+
+    # none for an order that failed on its way out
+    def order_ids(self, quote):
+        order = quote['order']
+        return [] if order.exception() is not None else order.result()['order_ids']
+
+    def cancel_ids(self, ids):
+        if ids:
+            self.session.post(f'{API_URL}/commands/cancel', params={'ids': ','.join(str(i) for i in ids)})
+            if self.mirror is not None:
+                self.mirror.on_cancel(ids)
+
+    # bulk cancel everything resting on a ticker in one call
+    def clear(self, ticker):
+        if self.live.get(ticker):
+            self.session.post(f'{API_URL}/commands/cancel', params={'ticker': ticker})
+            if self.mirror is not None:
+                self.mirror.on_cancel([o['order_id'] for o in self.mirror.orders(ticker)])
+        self.live[ticker] = {}
@@ -29,8 +29,6 @@ def signal_handler(signum, frame):
     
 API_KEY = {'X-API-Key': '7ASCTY2D'}
 shutdown = False
-session = requests.Session()
-session.headers.update(API_KEY)
     
 #code that gets the current tick
 def get_tick(session):
@@ -156,16 +154,23 @@ def main(margin = 0.15, delta_limit_threshold = 200, delta_hedge_switch = "ON"):
                 except Exception:
                     pass
                 threshhold = delta_limit_threshold
+                hedges = []
                 if helper['share_exposure'].iloc[0] > threshhold:
                     excess_delta = helper['share_exposure'].iloc[0] - threshhold
-                    market_order(session, "RTM", abs(excess_delta), "SELL")
+                    hedges.append(market_order(session, "RTM", abs(excess_delta), "SELL"))
                 if helper['share_exposure'].iloc[0]  <  -threshhold:
                     excess_delta = helper['share_exposure'].iloc[0] + threshhold
-                    market_order(session, "RTM", abs(excess_delta), "BUY")
+                    hedges.append(market_order(session, "RTM", abs(excess_delta), "BUY"))
                 if assets2["position"].iloc[1:].sum() == 0 and abs(assets2["position"].iloc[0]) < 50000:
                     excess_delta = helper['share_exposure'].iloc[0]
-                    market_order(session, "RTM", 100, "BUY", POSITION_SIZE = abs(excess_delta)) if excess_delta < 0 \
-                    else market_order(session, "RTM", abs(excess_delta), "SELL")
+                    hedges.append(market_order(session, "RTM", 100, "BUY", POSITION_SIZE = abs(excess_delta)) if excess_delta < 0 \
+                    else market_order(session, "RTM", abs(excess_delta), "SELL"))
+                # market orders go out asynchronously, wait for the fills before the next pass re-reads the delta
+                for hedge in hedges:
+                    try:
+                        hedge.result()
+                    except Exception as e:
+                        print("Hedge failed:", e)
             else: pass
             
 
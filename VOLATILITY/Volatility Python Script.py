@@ -29,8 +29,6 @@ def signal_handler(signum, frame):
     
 API_KEY = {'X-API-Key': '7ASCTY2D'}
 shutdown = False
-session = requests.Session()
-session.headers.update(API_KEY)
     
 #code that gets the current tick
 def get_tick(session):
@@ -5,12 +5,23 @@ Created on Fri Feb 16 18:08:22 2024
 @author: nolan
 """
 
+import os
+import sys
 import pandas as pd
 import numpy as np
 from scipy.stats import norm
 import numpy as np
 import warnings
 import re
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from api import fetch
+from gateway import order_gateway
+from risk import RiskGate
+
+RISK_SYNC_INTERVAL = 1.0  # seconds between reconciles of the risk gate against the server
+risk_synced_at = 0.0
 
 def black_scholes(s, k, t, r, sigma, option_type):
     """
@@ -40,29 +51,34 @@ def black_scholes(s, k, t, r, sigma, option_type):
 
 
 # ---------- TRADE EXECUTION ------------ #
-def market_order(session, security_name, quantity, action, POSITION_SIZE = 10000):
-    orders = int(abs(quantity) // POSITION_SIZE)
-    remainder = int(abs(quantity % POSITION_SIZE))
+# the shared gateway, with a pre-trade risk gate on the case limits attached on first use and reconciled
+# against the server at most once every RISK_SYNC_INTERVAL after that
+def gateway(session):
+    global risk_synced_at
+    gateway = order_gateway(session)
+    if gateway.risk is None:
+        gateway.set_risk(RiskGate.from_session(session))
+        risk_synced_at = time.monotonic()
+    elif time.monotonic() - risk_synced_at >= RISK_SYNC_INTERVAL:
+        sync_risk(session, gateway.risk)
+        risk_synced_at = time.monotonic()
+    return gateway
+
+
+# rebuild the gate from the server's positions and open orders, so passive fills move into its position and
+# filled orders stop holding reservations
+def sync_risk(session, gate):
+    since = gate.marker()
+    positions = {s['ticker']: s['position'] for s in fetch(session, 'securities')}
+    gate.sync(positions, fetch(session, 'orders', status='OPEN'), since)
 
-    for o in range(orders):
-        session.post('http://localhost:9999/v1/orders', params={'ticker': security_name, 'type': 'MARKET',
-                                                                'quantity': POSITION_SIZE, 'action': action})
 
-    session.post('http://localhost:9999/v1/orders', params={'ticker': security_name, 'type': 'MARKET',
-                                                            'quantity': remainder, 'action': action})
+def market_order(session, security_name, quantity, action, POSITION_SIZE = 10000):
+    return gateway(session).submit(security_name, quantity, action, 'MARKET', slice_size=POSITION_SIZE)
 
 
 def limit_order(session, security_name, price, quantity, action, POSITION_SIZE = 10):
-    orders = int(abs(quantity) // POSITION_SIZE)
-    remainder = int(abs(quantity % POSITION_SIZE))
-
-    for o in range(orders):
-        session.post('http://localhost:9999/v1/orders',
-                     params={'ticker': security_name, 'type': 'LIMIT', 'price': price,
-                             'quantity': POSITION_SIZE, 'action': action})
-
-    session.post('http://localhost:9999/v1/orders', params={'ticker': security_name, 'type': 'LIMIT', 'price': price,
-                                                            'quantity': remainder, 'action': action})
+    return gateway(session).submit(security_name, quantity, action, 'LIMIT', price, slice_size=POSITION_SIZE)
 
 
 def delete_all_orders(session, ticker, POSITION_SIZE = 10):
@@ -72,6 +88,7 @@ def delete_all_orders(session, ticker, POSITION_SIZE = 10):
         for order in orders:
             id = order["order_id"]
             session.delete('http://localhost:9999/v1/orders/{}'.format(id))
+        gateway(session).risk.on_cancel([order["order_id"] for order in orders])
 
 def offload_inventory(session, ticker, POSITION_SIZE = 10):
     bid, ask, volume = get_asset_info(session, ticker)
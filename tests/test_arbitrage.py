@@ -0,0 +1,30 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from arbitrage import RollingStats
+
+
+def test_rolling_stats_match_numpy_over_a_wrapped_window():
+    rng = np.random.default_rng(0)
+    # a spread-like series: small moves around a level far from zero, with a jump in the middle
+    values = 25 + np.cumsum(rng.normal(0, 0.01, 2000))
+    values[1000:] += 3.0
+    stats = RollingStats(window=50)
+    for i, x in enumerate(values, 1):
+        stats.add(x)
+        window = values[max(0, i - 50):i]
+        assert stats.count == len(window)
+        assert np.isclose(stats.mean, window.mean(), rtol=0, atol=1e-9)
+        if i > 1:
+            assert np.isclose(stats.variance, np.var(window, ddof=1), rtol=1e-6, atol=1e-12)
+    assert np.isclose(stats.zscore(values[-1] + 0.1), (values[-1] + 0.1 - window.mean()) / np.std(window, ddof=1))
+
+
+def test_rolling_stats_on_a_flat_window():
+    stats = RollingStats(window=5)
+    for _ in range(12):
+        stats.add(24.5)
+    assert stats.variance == 0.0 and stats.zscore(25.0) == 0.0
@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from book import book_side, liquidation_cost, tender_edge, walk_book
+
+
+def order(order_id, price, quantity, filled=0):
+    return {'order_id': order_id, 'price': price, 'quantity': quantity, 'quantity_filled': filled}
+
+
+# the best bid is partly filled already and our own quote sits at the top of the asks
+BOOK = {'bids': [order(1, 24.9, 1000, 400), order(2, 24.8, 2000), order(3, 24.7, 1000)],
+        'asks': [order(9, 24.95, 500), order(4, 25.0, 1000, 250), order(5, 25.1, 3000)]}
+
+
+def test_book_side_counts_what_is_left_and_skips_our_orders():
+    prices, sizes = book_side(BOOK, 'SELL')
+    assert list(prices) == [24.9, 24.8, 24.7] and list(sizes) == [600, 2000, 1000]
+    prices, sizes = book_side(BOOK, 'BUY', exclude={9})
+    assert list(prices) == [25.0, 25.1] and list(sizes) == [750, 3000]
+
+
+def test_walk_book_fills_every_quantity_at_once():
+    prices, sizes = book_side(BOOK, 'SELL')
+    filled, notional, last = walk_book(prices, sizes, [500, 2000, 5000])
+    assert list(filled) == [500, 2000, 3600]
+    assert np.allclose(notional, [500 * 24.9, 600 * 24.9 + 1400 * 24.8, 600 * 24.9 + 2000 * 24.8 + 1000 * 24.7])
+    assert list(last) == [24.9, 24.8, 24.7]
+
+
+def test_walk_book_on_an_empty_side():
+    filled, notional, last = walk_book(np.array([]), np.array([]), [100])
+    assert filled[0] == 0 and notional[0] == 0 and np.isnan(last[0])
+
+
+def test_liquidation_cost_includes_the_fee():
+    cost = liquidation_cost(BOOK, 'BUY', 2000, fee=0.02)
+    vwap = (600 * 24.9 + 1400 * 24.8) / 2000
+    assert np.isclose(cost['vwap'][0], vwap)
+    assert np.isclose(cost['proceeds'][0], vwap * 2000 - 0.02 * 2000)
+    assert np.isclose(cost['break_even'][0], vwap - 0.02)
+
+    # a SELL tender is bought back from the asks, so the fee raises the cost and lowers the break-even
+    cost = liquidation_cost(BOOK, 'SELL', 1000, fee=0.02, exclude={9})
+    vwap = (750 * 25.0 + 250 * 25.1) / 1000
+    assert np.isclose(cost['proceeds'][0], -vwap * 1000 - 0.02 * 1000)
+    assert np.isclose(cost['break_even'][0], vwap + 0.02)
+
+
+def test_liquidation_cost_marks_the_rest_at_the_deepest_level():
+    cost = liquidation_cost(BOOK, 'BUY', 5000)
+    assert cost['filled'][0] == 3600 and cost['unfilled'][0] == 1400
+    notional = 600 * 24.9 + 2000 * 24.8 + 1000 * 24.7 + 1400 * 24.7
+    assert np.isclose(cost['vwap'][0], notional / 5000)
+
+
+def test_tender_edge():
+    edge, cost = tender_edge(BOOK, 'BUY', 2000, 24.7, fee=0.02)
+    assert np.isclose(edge, (600 * 24.9 + 1400 * 24.8) / 2000 - 0.02 - 24.7)
+    edge, cost = tender_edge(BOOK, 'SELL', 1000, 25.2, fee=0.02, exclude={9})
+    assert np.isclose(edge, 25.2 - (750 * 25.0 + 250 * 25.1) / 1000 - 0.02)
+    # nothing to unwind into: never worth taking
+    edge, cost = tender_edge({'bids': [], 'asks': []}, 'BUY', 1000, 1.0)
+    assert np.isnan(edge)
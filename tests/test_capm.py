@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'CAPM ALGO'))
+from library import BetaEngine
+
+TICKERS = ['ALPHA', 'GAMMA', 'THETA']
+
+
+def price_path(n, seed=0):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, n)
+    stocks = np.column_stack([beta * market + rng.normal(0, 0.005, n) for beta in (0.5, 1.0, 1.8)])
+    returns = np.column_stack([market, stocks])
+    return 25 * np.vstack([np.ones(len(TICKERS) + 1), np.cumprod(1 + returns, axis=0)])
+
+
+def pandas_betas(prices, capacity):
+    returns = pd.DataFrame(prices).pct_change().dropna().tail(capacity)
+    market = returns[0]
+    return np.array([returns[i].cov(market) / market.var() for i in range(1, len(TICKERS) + 1)])
+
+
+def test_betas_match_pandas_across_wraps_and_resyncs():
+    capacity = 30
+    prices = price_path(100)
+    engine = BetaEngine(TICKERS, capacity=capacity)
+    # before the window fills, right after a resync (60 and 90 returns) and between resyncs after wrapping
+    checks = {10, 45, 60, 90, 100}
+    for i, row in enumerate(prices):
+        engine.update_prices(row)
+        if i in checks:
+            assert engine.count == min(i, capacity)
+            assert np.allclose(engine.betas(), pandas_betas(prices[:i + 1], capacity), rtol=1e-9, atol=1e-12)
+
+
+def test_unchanged_prices_add_no_return():
+    prices = price_path(5)
+    engine = BetaEngine(TICKERS, capacity=30)
+    for row in prices:
+        engine.update_prices(row)
+        engine.update_prices(row.copy())
+    assert engine.count == 5
+    assert np.allclose(engine.betas(), pandas_betas(prices, 30))
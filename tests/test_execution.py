@@ -0,0 +1,80 @@
+import os
+import sys
+from concurrent.futures import Future
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from execution import UnwindEngine
+
+
+class BookResponse:
+    ok = True
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+# hands out the books in order, one per read, then keeps repeating the last
+class BookSession:
+    def __init__(self, books):
+        self.books = list(books)
+        self.last = None
+
+    def get(self, url, params=None):
+        self.last = self.books.pop(0) if len(self.books) > 1 else self.books[0]
+        return BookResponse(self.last)
+
+
+# every child fills in full at the touch of the last book read
+class FilledGateway:
+    def __init__(self, session):
+        self.session = session
+        self.children = []
+
+    def submit(self, ticker, quantity, action, slice_size=None, priority=None):
+        self.children.append(quantity)
+        price = self.session.last['bids'][0]['price']
+        future = Future()
+        future.set_result({'acks': [{'ticker': ticker, 'action': action, 'quantity_filled': quantity, 'vwap': price}]})
+        return future
+
+
+def bids(*levels):
+    return {'bids': [{'order_id': i, 'price': price, 'quantity': size, 'quantity_filled': 0}
+                     for i, (price, size) in enumerate(levels)], 'asks': []}
+
+
+def engine(books, **kwargs):
+    session = BookSession(books)
+    return UnwindEngine(session, FilledGateway(session), refill_wait=0, max_seconds=5, **kwargs)
+
+
+def test_unwind_stops_at_the_cost_cap():
+    # 5000 within tolerance of the touch, then the bid falls 0.30 through the arrival touch
+    unwinder = engine([bids((24.9, 3000), (24.88, 2000), (24.5, 50000)), bids((24.6, 50000))], max_cost=0.25)
+    report = unwinder.unwind('RITC', 20000, 'SELL')
+    assert unwinder.gateway.children == [5000]
+    assert report['reason'] == 'cost cap'
+    assert report['filled'] == 5000 and report['remaining'] == 15000
+    assert report['arrival'] == 24.9 and np.isclose(report['vwap'], 24.9)
+    assert np.isclose(report['cost'], 0.0)
+
+
+def test_unwind_stops_at_the_limit_price():
+    unwinder = engine([bids((24.9, 3000)), bids((24.85, 3000)), bids((24.75, 3000))], max_cost=1.0)
+    report = unwinder.unwind('RITC', 20000, 'SELL', limit=24.8)
+    assert unwinder.gateway.children == [3000, 3000]
+    assert report['reason'] == 'limit' and report['filled'] == 6000 and report['remaining'] == 14000
+    # sold 3000 of it 0.05 below the arrival touch
+    assert np.isclose(report['cost'], 150.0) and np.isclose(report['cost_per_share'], 0.025)
+
+
+def test_unwind_caps_children_at_the_max_trade_size():
+    unwinder = engine([bids((24.9, 100000))])
+    report = unwinder.unwind('RITC', 25000, 'SELL')
+    assert unwinder.gateway.children == [10000, 10000, 5000]
+    assert report['reason'] == 'done' and report['filled'] == 25000 and report['remaining'] == 0
@@ -0,0 +1,63 @@
+import itertools
+import os
+import sys
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from gateway import OrderGateway
+
+ORDER_IDS = itertools.count(1)
+
+
+class AckResponse:
+    ok = True
+    status_code = 200
+    headers = {'Content-Type': 'application/json'}
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+# every order is filled in full at 10.0, without a server
+class FilledSession(requests.Session):
+    def post(self, url, params=None, **kwargs):
+        return AckResponse(dict(params, order_id=next(ORDER_IDS), status='TRANSACTED',
+                                quantity_filled=params['quantity'], vwap=10.0))
+
+
+class BrokenRisk:
+    def __init__(self):
+        self.released = 0
+
+    def reserve(self, ticker, action, quantity):
+        return quantity
+
+    def on_ack(self, ack):
+        raise RuntimeError('risk bookkeeping failed')
+
+    def release(self, ticker, action, quantity):
+        self.released += quantity
+
+
+def broken_listener(ack):
+    raise ValueError('listener failed')
+
+
+def test_failing_ack_handlers_keep_the_order():
+    gateway = OrderGateway({'X-API-Key': 'test'}, rates={'T': 1000}, session_class=FilledSession)
+    risk = BrokenRisk()
+    gateway.set_risk(risk)
+    gateway.add_listener(broken_listener)
+    try:
+        result = gateway.submit('T', 25, 'BUY', slice_size=10).result(timeout=5)
+    finally:
+        gateway.close()
+    assert len(result['order_ids']) == 3
+    assert sorted(ack['quantity_filled'] for ack in result['acks']) == [5, 10, 10]
+    assert result['rejects'] == [] and not gateway.rejects
+    # acked orders are the gate's to account for, never released as if they had failed
+    assert risk.released == 0
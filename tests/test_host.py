@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from host import FIELDS, SharedFeed
+
+TICKERS = [f'T{i}' for i in range(1000)]
+
+
+def snapshot(n):
+    case = {'tick': n, 'period': 1, 'status': 'ACTIVE'}
+    return case, [dict({field: n for field in FIELDS}, ticker=ticker) for ticker in TICKERS]
+
+
+# every field of snapshot n holds n, so a record mixing two writes is easy to spot
+def write_forever(description, stop):
+    feed = SharedFeed.attach(*description)
+    n = 1
+    while not stop.is_set():
+        feed.write(*snapshot(n))
+        n += 1
+    feed.close()
+
+
+def test_reads_never_return_a_torn_slot():
+    # one slot, so every write rewrites the slot readers are copying
+    feed = SharedFeed.create(*snapshot(0), slots=1)
+    stop = multiprocessing.Event()
+    writer = multiprocessing.Process(target=write_forever, args=(feed.describe(), stop))
+    writer.start()
+    try:
+        reads = 0
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline:
+            seq, record = feed.read()
+            values = record['values']
+            assert values.min() == values.max() == record['tick'], f'torn read at seq {seq}'
+            reads += 1
+        assert reads > 0
+    finally:
+        stop.set()
+        writer.join()
+        feed.close()
+
+
+def test_read_round_trip():
+    case, securities = snapshot(7)
+    securities[0]['bid'] = None
+    feed = SharedFeed.create(case, securities, slots=4)
+    try:
+        seq, record = feed.read()
+        assert seq == 0
+        assert feed.case(record)['tick'] == 7
+        out = feed.securities(record, 'T0')[0]
+        assert out['bid'] is None and out['position'] == 7 and isinstance(out['position'], int)
+        assert np.isnan(record['values'][0][FIELDS.index('bid')])
+    finally:
+        feed.close()
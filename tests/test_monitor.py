@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'COMMON'))
+sys.path.append(os.path.join(ROOT, 'ETF'))
+from monitor import DepthFeatures
+
+
+# sizes chosen so each ticker's imbalance is exactly the value given
+def cols(*imbalances):
+    imbalances = np.array(imbalances, dtype=float)
+    return {'bid_size': 100 * (1 + imbalances), 'ask_size': 100 * (1 - imbalances),
+            'bid': np.full(len(imbalances), 24.9), 'ask': np.full(len(imbalances), 25.1)}
+
+
+def test_depth_features_use_the_time_between_updates():
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.choice([0.01, 0.25, 1.0, 3.0], 40))
+    values = rng.uniform(-0.9, 0.9, (40, 2))
+    features = DepthFeatures(halflife=2.0, window=8)
+    ew = None
+    for k, (now, v) in enumerate(zip(times, values)):
+        out = features.update(cols(*v), now=now)
+        ew = v if ew is None else ew + (1 - 2 ** (-(now - times[k - 1]) / 2.0)) * (v - ew)
+        oldest = k - 8 if k >= 8 else 0
+        slope = (v - values[oldest]) / (now - times[oldest]) if k else np.zeros(2)
+        assert np.allclose(out['imbalance'], v)
+        assert np.allclose(out['ew_imbalance'], ew)
+        assert np.allclose(out['slope'], slope)
+
+
+def test_depth_features_decay_by_halflife():
+    features = DepthFeatures(halflife=2.0)
+    features.update(cols(0.8), now=10.0)
+    # two seconds later the old observation weighs half
+    assert np.isclose(features.update(cols(0.0), now=12.0)['ew_imbalance'][0], 0.4)
+    # a quick repoll barely moves it
+    assert np.isclose(features.update(cols(-0.8), now=12.01)['ew_imbalance'][0], 0.4 - 1.2 * (1 - 2 ** (-0.005)))
+
+
+def test_new_tickers_start_at_their_first_observation():
+    features = DepthFeatures()
+    features.update(cols(0.5), now=0.0)
+    out = features.update(cols(0.5, -0.5), now=1.0)
+    assert np.allclose(out['ew_imbalance'], [0.5, -0.5])
+    assert np.allclose(out['slope'], [0.0, 0.0])
@@ -0,0 +1,36 @@
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from recorder import apply_delta, encode_delta
+
+FIELDS = ['bid', 'ask', 'position', 'last', 'status', 'vwap']
+
+
+def random_record(rng, key):
+    record = {'ticker': key}
+    for field in rng.sample(FIELDS, rng.randint(0, len(FIELDS))):
+        record[field] = rng.choice([None, 0, 1, 2.5, 'OPEN', 'TRANSACTED'])
+    return record
+
+
+def random_body(rng):
+    keys = rng.sample(['A', 'B', 'C', 'D', 'E'], rng.randint(0, 5))
+    return [random_record(rng, key) for key in keys]
+
+
+def test_list_delta_round_trip():
+    rng = random.Random(1)
+    for _ in range(2000):
+        prev, curr = random_body(rng), random_body(rng)
+        delta = encode_delta(prev, curr, 'securities')
+        assert delta is not None
+        assert apply_delta(prev, delta, 'securities') == curr
+
+
+def test_dict_delta_round_trip():
+    rng = random.Random(2)
+    for _ in range(2000):
+        prev, curr = random_record(rng, 'A'), random_record(rng, 'A')
+        assert apply_delta(prev, encode_delta(prev, curr, 'case'), 'case') == curr
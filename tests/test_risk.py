@@ -0,0 +1,85 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'COMMON'))
+from risk import RiskGate
+
+
+# two stocks at one unit each and an ETF at two, like the market making case
+def make_gate(gross=1000, net=500):
+    return RiskGate({'L': (gross, net)}, {'A': [('L', 1)], 'B': [('L', 1)], 'ETF': [('L', 2)]})
+
+
+def ack(order_id, ticker, action, quantity, filled, status='TRANSACTED'):
+    return {'order_id': order_id, 'ticker': ticker, 'action': action, 'quantity': quantity,
+            'quantity_filled': filled, 'status': status}
+
+
+def test_net_limit_counts_in_flight_orders():
+    gate = make_gate()
+    assert gate.reserve('A', 'BUY', 300) == 300
+    # 300 in flight on A leaves 200 of the net limit, 100 ETF shares at two units each
+    assert gate.allowed('B', 'BUY', 1000) == 200
+    assert gate.allowed('ETF', 'BUY', 1000) == 100
+    assert gate.reserve('B', 'BUY', 1000) == 200
+    assert gate.allowed('A', 'BUY', 1) == 0
+    # selling adds no long exposure, so the net limit doesn't stop it
+    assert gate.allowed('A', 'SELL', 400) == 400
+
+
+def test_gross_limit_counts_in_flight_orders():
+    gate = make_gate(gross=600, net=10000)
+    assert gate.reserve('A', 'BUY', 400) == 400
+    assert gate.reserve('B', 'SELL', 1000) == 200
+    assert gate.allowed('ETF', 'SELL', 10) == 0
+    # a sell on A works the reservation down, it doesn't add exposure
+    assert gate.allowed('A', 'SELL', 400) == 400
+
+
+def test_release_and_ack_free_the_reservation():
+    gate = make_gate()
+    assert gate.reserve('A', 'BUY', 500) == 500
+    assert gate.allowed('B', 'BUY', 100) == 0
+    gate.release('A', 'BUY', 200)
+    assert gate.allowed('B', 'BUY', 1000) == 200
+
+    # 300 still in flight: 100 fill, the rest rests on the book
+    gate.on_ack(ack(1, 'A', 'BUY', 300, 100, status='OPEN'))
+    assert gate.position['A'] == 100 and gate.buys['A'] == 200 and gate.inflight['A', 'BUY'] == 0
+    gate.on_cancel([1])
+    assert gate.buys['A'] == 0
+    assert gate.allowed('B', 'BUY', 1000) == 400
+
+    # an ack for more than was reserved can't take the reservation negative
+    gate.on_ack(ack(2, 'A', 'BUY', 50, 50))
+    assert gate.inflight['A', 'BUY'] == 0 and gate.buys['A'] == 0 and gate.position['A'] == 150
+
+
+def test_sync_keeps_in_flight_and_racing_acks():
+    gate = make_gate()
+    gate.reserve('A', 'BUY', 300)
+    gate.reserve('B', 'BUY', 100)
+    since = gate.marker()
+    # the server snapshot is fetched now: nothing has reached it yet
+    positions, open_orders = {'A': 0, 'B': 0}, []
+    # A's order is acked and filled before the snapshot is applied
+    gate.on_ack(ack(1, 'A', 'BUY', 300, 300))
+    gate.sync(positions, open_orders, since)
+    # B is still in flight and A's fill, which the snapshot may have missed, stays reserved
+    assert gate.buys['A'] == 300 and gate.buys['B'] == 100
+    assert gate.allowed('A', 'BUY', 1000) == 100
+
+    # the next snapshot is fetched after the ack, so it has the fill and the carry-over goes
+    since = gate.marker()
+    gate.sync({'A': 300, 'B': 0}, [], since)
+    assert gate.position['A'] == 300 and gate.buys['A'] == 0 and gate.buys['B'] == 100
+    assert gate.allowed('A', 'BUY', 1000) == 100
+
+
+def test_sync_rebuilds_resting_orders():
+    gate = make_gate()
+    gate.sync({'A': 100}, [{'order_id': 7, 'ticker': 'A', 'action': 'SELL', 'quantity': 50, 'quantity_filled': 20}])
+    assert gate.position['A'] == 100 and gate.sells['A'] == 30
+    gate.on_cancel([7])
+    assert gate.sells['A'] == 0
+    assert gate.allowed('A', 'BUY', 1000) == 400
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'COMMON'))
+sys.path.append(os.path.join(ROOT, 'ETF'))
+from tender_bid import INTERCEPT, SLOPE, FillModel, capture_outcomes
+
+
+def test_fit_recovers_the_curve():
+    rng = np.random.default_rng(0)
+    premiums = rng.uniform(-0.3, 0.3, 5000)
+    won = rng.random(5000) < 1 / (1 + np.exp(-(-0.5 + 8.0 * premiums)))
+    model = FillModel.fit(premiums, won)
+    assert abs(model.intercept + 0.5) < 0.15
+    assert abs(model.slope - 8.0) < 1.0
+
+
+def test_fit_falls_back_to_the_prior():
+    few = FillModel.fit([0.1, -0.1, 0.0], [True, False, True])
+    one_sided = FillModel.fit(np.linspace(-0.3, 0.3, 100), [True] * 100)
+    for model in (few, one_sided):
+        assert (model.intercept, model.slope) == (INTERCEPT, SLOPE)
+
+
+def securities(t, position):
+    return {'t': t, 'k': 1, 's': 200, 'f': [{'ticker': 'RITC', 'bid': 24.9, 'ask': 25.1, 'position': position}]}
+
+
+def tenders(t, *listed):
+    body = [{'tender_id': i, 'ticker': 'RITC', 'action': 'BUY', 'quantity': 1000, 'is_fixed_bid': False, 'price': None}
+            for i in listed]
+    return {'t': t, 'k': 0, 's': 200, 'f': body}
+
+
+def test_capture_outcomes_reads_wins_from_the_position(tmp_path):
+    # tender 1 is won (position +1000 when it closes, with one of our own fills of -200 in between),
+    # tender 2 is lost (only our own fill moves the position)
+    lines = [
+        {'stream': 0, 'm': 'GET', 'e': 'tenders', 'p': {}},
+        {'stream': 1, 'm': 'GET', 'e': 'securities', 'p': {}},
+        {'stream': 2, 'm': 'POST', 'e': 'tenders/1', 'p': {'price': '25.05'}},
+        {'stream': 3, 'm': 'POST', 'e': 'tenders/2', 'p': {'price': '24.90'}},
+        {'stream': 4, 'm': 'POST', 'e': 'orders', 'p': {'ticker': 'RITC', 'type': 'MARKET', 'quantity': '200', 'action': 'SELL'}},
+        tenders(1.0, 1, 2), securities(1.0, 0),
+        {'t': 1.1, 'k': 2, 's': 200, 'f': {'success': True}},
+        {'t': 1.2, 'k': 3, 's': 200, 'f': {'success': True}},
+        {'t': 1.5, 'k': 4, 's': 200, 'f': {'order_id': 9, 'ticker': 'RITC', 'action': 'SELL', 'quantity_filled': 200}},
+        tenders(2.0, 2), securities(2.0, 800),
+        tenders(3.0), securities(3.0, 800),
+    ]
+    path = tmp_path / 'bids.ritlog'
+    path.write_text(''.join(json.dumps(line) + '\n' for line in lines))
+    outcomes = sorted(capture_outcomes(str(path)))
+    assert [won for _, won in outcomes] == [False, True]
+    assert np.allclose([p for p, _ in outcomes], [-0.1, 0.05])